@@ -0,0 +1,18 @@
+"""
+Shared decouple configuration for settings and services.
+
+The .env file sits in the parent of the Django project directory. Its path is
+resolved once at import with pathlib, so callers do not rely on decouple's
+AutoConfig searching the filesystem upwards from their own module.
+"""
+from pathlib import Path
+from decouple import Config, RepositoryEnv, config as auto_config
+
+# <repo>/.env (this file is <repo>/cti4bc_backend/cti4bc_backend/env.py)
+ENV_FILE = Path(__file__).resolve().parent.parent.parent / '.env'
+
+if ENV_FILE.is_file():
+    config = Config(RepositoryEnv(ENV_FILE))
+else:
+    # No .env file: decouple falls back to the process environment
+    config = auto_config
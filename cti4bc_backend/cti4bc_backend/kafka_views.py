@@ -3,12 +3,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from cti4bc.kafkaConsumer import KafkaConsumerThread
 from django.conf import settings
-from event.views import new_security_alert
+from event.views import get_topic_organization, new_security_alert
 import json
 import threading
 import itertools
 from collections import deque
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib parser
+    orjson = None
+
 # Global variables for message storage
 consumer_manager = None
 message_history = deque(maxlen=100)  # Store last 100 messages
@@ -17,57 +22,59 @@ message_lock = threading.Lock()
 # reliably detect which entries are new (next() is atomic under the GIL).
 _message_seq = itertools.count(1)
 
-# Custom handler that saves messages to history
-def message_handler_with_history(message, topic):
-    # Process the message with the regular handler (for security alerts)
+def _parse_message(message):
+    """Parse a message's JSON text once (with orjson when installed); None if it is not JSON."""
     try:
-        new_security_alert(message, topic)
-    except Exception as e:
-        print(f"Error in new_security_alert: {e}")
-    
-    # Also save to our history for UI display
+        return orjson.loads(message) if orjson is not None else json.loads(message)
+    except ValueError:  # orjson and json decode errors are both ValueErrors
+        return None
+
+def _history_entry(message, topic, parsed_message):
+    """Build the message history entry of a Kafka message (the parsed JSON when it is an object)."""
+    if isinstance(parsed_message, dict):
+        return {
+            'id': next(_message_seq),
+            'topic': topic,
+            'timestamp': parsed_message.get('timestamp', ''),
+            'message': parsed_message
+        }
+    # Store as raw string if it is not a JSON object
+    return {
+        'id': next(_message_seq),
+        'topic': topic,
+        'timestamp': '',
+        'value': message  # Use 'value' for raw messages
+    }
+
+# Custom handler that processes messages and saves them to history. It is called once
+# per polled batch of a topic: the topic's organization is looked up once and the
+# history lock is taken once for the whole batch
+def messages_handler_with_history(messages, topic):
     try:
-        # Ensure message is a string before parsing
+        organization = get_topic_organization(topic)
+    except Exception as e:
+        # Each alert then retries the lookup and reports its own error
+        print(f"Error resolving organization for topic {topic}: {e}")
+        organization = None
+
+    entries = []
+    for message in messages:
+        # Ensure message is a string, then parse it once for both the alert and the history
         if not isinstance(message, str):
             message = str(message)
-            
-        # Try to parse the message as JSON
+        parsed_message = _parse_message(message)
         try:
-            parsed_message = json.loads(message)
-            
-            # Store in history with parsed JSON
-            with message_lock:
-                message_entry = {
-                    'id': next(_message_seq),
-                    'topic': topic,
-                    'timestamp': parsed_message.get('timestamp', ''),
-                    'message': parsed_message
-                }
-                message_history.appendleft(message_entry)
-        except json.JSONDecodeError as e:
-            # Store as raw string if parsing fails
-            with message_lock:
-                message_entry = {
-                    'id': next(_message_seq),
-                    'topic': topic,
-                    'timestamp': '',
-                    'value': message  # Use 'value' for raw messages
-                }
-                message_history.appendleft(message_entry)
+            alert = parsed_message if isinstance(parsed_message, dict) else message
+            new_security_alert(alert, topic, organization=organization)
+        except Exception as e:
+            print(f"Error in new_security_alert: {e}")
+        entries.append(_history_entry(message, topic, parsed_message))
+
+    try:
+        with message_lock:
+            message_history.extendleft(entries)
     except Exception as e:
-        print(f"Error processing message for history: {e}")
-        # Last resort fallback
-        try:
-            with message_lock:
-                message_entry = {
-                    'id': next(_message_seq),
-                    'topic': topic,
-                    'timestamp': '',
-                    'value': str(message)  # Ensure it's a string
-                }
-                message_history.appendleft(message_entry)
-        except Exception as e2:
-            print(f"Critical error storing message: {e2}")
+        print(f"Critical error storing messages: {e}")
 
 class StartConsumerView(APIView):
     """
@@ -90,17 +97,17 @@ class StartConsumerView(APIView):
             with message_lock:
                 message_history.clear()
             
-            # Register handler for each topic
+            # Register a batch handler for each topic
             topic_handlers = {}
             for topic in topics:
-                topic_handlers[topic] = message_handler_with_history
+                topic_handlers[topic] = messages_handler_with_history
             
             consumer_manager = KafkaConsumerThread(
                 topics=topics,
                 kafka_url=settings.KAFKA_SERVER,
                 kafka_username=settings.KAFKA_USERNAME,
                 kafka_password=settings.KAFKA_PASSWORD,
-                handlers=topic_handlers
+                batch_handlers=topic_handlers
             )
             consumer_manager.start()
             
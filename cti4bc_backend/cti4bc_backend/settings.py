@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import Config, RepositoryEnv, Csv
+from decouple import Csv
 import os
 from datetime import timedelta
 import logging
@@ -19,12 +19,8 @@ import logging
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Configure decouple to look for .env file in the parent directory
-ENV_FILE = BASE_DIR.parent / '.env'
-if ENV_FILE.exists():
-    config = Config(RepositoryEnv(ENV_FILE))
-else:
-    from decouple import config
+# decouple reads the .env file in the parent directory (see cti4bc_backend/env.py)
+from cti4bc_backend.env import ENV_FILE, config
 
 logging.basicConfig(
     level=logging.INFO,
@@ -260,13 +256,26 @@ LLM_PROVIDER = config('LLM_PROVIDER', default='gemini')  # gemini, ollama
 OLLAMA_URL = config('OLLAMA_URL', default='http://localhost:11434')
 OLLAMA_MODEL = config('OLLAMA_MODEL', default='llama3.1:8b')
 
+# Largest event set a single report may analyze (bounds the prompt size and worker memory)
+REPORT_MAX_EVENTS = config('REPORT_MAX_EVENTS', default=50, cast=int)
+
+# IP reputation enrichment of new events
+# At most IP_ENRICH_MAX public IPs are checked per event; above
+# IP_ENRICH_ASYNC_THRESHOLD the check runs in the qcluster worker instead of
+# blocking the request that saved the event.
+IP_ENRICH_MAX = config('IP_ENRICH_MAX', default=50, cast=int)
+IP_ENRICH_ASYNC_THRESHOLD = config('IP_ENRICH_ASYNC_THRESHOLD', default=10, cast=int)
+
 # Django-Q2 task queue configuration
 # Uses the existing PostgreSQL database as the broker (ORM broker) — no Redis/Celery.
 # Report generation runs in the `qcluster` worker process, not in the HTTP request.
+# Q_WORKERS bounds how many generations are in flight at once; keep it in line with
+# the LLM server's parallelism (e.g. OLLAMA_NUM_PARALLEL) so concurrent requests are
+# batched on the GPU instead of queued one by one.
 Q_CLUSTER = {
     'name': 'cti4bc',
     'orm': 'default',              # use the default DB as the broker
-    'workers': 2,
+    'workers': config('Q_WORKERS', default=2, cast=int),
     'timeout': 900,                # 15 min hard cap per task (>= Ollama large-model timeout)
     'retry': 1200,                 # must be > timeout so tasks are not re-queued mid-run
     'max_attempts': 1,             # do not silently re-run an LLM generation
@@ -56,14 +56,16 @@ async def _run_sharing_tasks(misp_servers, orgs, data):
     """
     Creates tasks for both MISP and Organization sharing and runs them concurrently
     """
-    tasks = []
-    for server in misp_servers:
-        tasks.append(asyncio.create_task(_share_to_misp(server['id'], server['name'], server['url'], server['api_key'], data)))
-    
-    for org in orgs:
-        tasks.append(asyncio.create_task(_share_to_org_topic(org['id'], org['name'], org['prefix'], data)))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # One MISP HTTP session (connection pool) for every task of this share
+    async with misp.event.session():
+        tasks = []
+        for server in misp_servers:
+            tasks.append(asyncio.create_task(_share_to_misp(server['id'], server['name'], server['url'], server['api_key'], data)))
+        
+        for org in orgs:
+            tasks.append(asyncio.create_task(_share_to_org_topic(org['id'], org['name'], org['prefix'], data)))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
     return results
 
 def share_all(misp_servers, orgs, data):
@@ -614,17 +614,23 @@ class UpdateEventShareStatusView(APIView):
         else:
             return Response({'message': 'No change in share status.'}, status=200)
 
-def new_security_alert(message, topic):
-    arrival_time = timezone.now()
-
-    # Extract organization prefix from topic
+def get_topic_organization(topic):
+    """Return the organization whose use-case prefix starts the Kafka ``topic`` (e.g. UC1.alerts)."""
     match = re.match(r'^(UC\d+)\.', topic)
     use_case_prefix = match.group(1) if match else None
-    organization = Organization.objects.get(prefix=use_case_prefix)
+    return Organization.objects.get(prefix=use_case_prefix)
+
+def new_security_alert(message, topic, organization=None):
+    """Create an Event from a Kafka alert ``message`` (JSON text, or the already parsed dict)."""
+    arrival_time = timezone.now()
+
+    # Organization of the topic (resolved once per batch by batch callers)
+    if organization is None:
+        organization = get_topic_organization(topic)
     
     try:
         # Parse the alert message
-        alert_data = json.loads(message)
+        alert_data = message if isinstance(message, dict) else json.loads(message)
         
         parsed_alert = parse_alert_message(alert_data)
         
@@ -682,19 +688,13 @@ def new_security_alert(message, topic):
                 
                 # If not in database, check with reputation service
                 if not record:
-                    from ip_reputation.services import IPReputationService
-                    import asyncio
+                    from ip_reputation.services import get_ip_reputation_service, run_sync
                     
-                    service = IPReputationService()
-                    # Run the async function synchronously
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        reputation_result = loop.run_until_complete(service.check_ip_reputation(src_asset_uuid))
-                        # Re-check in database after the service call
-                        record = IPReputationRecord.objects.filter(ip_address=src_asset_uuid).first()
-                    finally:
-                        loop.close()
+                    service = get_ip_reputation_service()
+                    # Run the async function synchronously on the shared service loop
+                    reputation_result = run_sync(service.check_ip_reputation(src_asset_uuid))
+                    # Re-check in database after the service call
+                    record = IPReputationRecord.objects.filter(ip_address=src_asset_uuid).first()
                 
                 # Check if it's malicious
                 if record and record.is_malicious:
@@ -724,19 +724,13 @@ def new_security_alert(message, topic):
                 
                 # If not in database, check with reputation service
                 if not record:
-                    from ip_reputation.services import IPReputationService
-                    import asyncio
+                    from ip_reputation.services import get_ip_reputation_service, run_sync
                     
-                    service = IPReputationService()
-                    # Run the async function synchronously
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        reputation_result = loop.run_until_complete(service.check_ip_reputation(dst_asset_uuid))
-                        # Re-check in database after the service call
-                        record = IPReputationRecord.objects.filter(ip_address=dst_asset_uuid).first()
-                    finally:
-                        loop.close()
+                    service = get_ip_reputation_service()
+                    # Run the async function synchronously on the shared service loop
+                    reputation_result = run_sync(service.check_ip_reputation(dst_asset_uuid))
+                    # Re-check in database after the service call
+                    record = IPReputationRecord.objects.filter(ip_address=dst_asset_uuid).first()
                 
                 # Check if it's malicious
                 if record and record.is_malicious:
@@ -776,19 +770,13 @@ def new_security_alert(message, topic):
                             
                             # If not in database, check with reputation service
                             if not record:
-                                from ip_reputation.services import IPReputationService
-                                import asyncio
+                                from ip_reputation.services import get_ip_reputation_service, run_sync
                                 
-                                service = IPReputationService()
-                                # Run the async function synchronously
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                try:
-                                    reputation_result = loop.run_until_complete(service.check_ip_reputation(ip_value))
-                                    # Re-check in database after the service call
-                                    record = IPReputationRecord.objects.filter(ip_address=ip_value).first()
-                                finally:
-                                    loop.close()
+                                service = get_ip_reputation_service()
+                                # Run the async function synchronously on the shared service loop
+                                reputation_result = run_sync(service.check_ip_reputation(ip_value))
+                                # Re-check in database after the service call
+                                record = IPReputationRecord.objects.filter(ip_address=ip_value).first()
                             
                             # Check if it's malicious
                             if record and record.is_malicious:
@@ -16,24 +16,6 @@ class APIConfiguration(models.Model):
     
     def __str__(self):
         return self.name
-    
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Invalidate cache when configuration is updated
-        try:
-            from .utils_config import invalidate_api_cache
-            invalidate_api_cache()
-        except ImportError:
-            pass
-    
-    def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
-        # Invalidate cache when configuration is deleted
-        try:
-            from .utils_config import invalidate_api_cache
-            invalidate_api_cache()
-        except ImportError:
-            pass
 
 
 class IPReputationRecord(models.Model):
@@ -5,7 +5,10 @@ from datetime import datetime, timedelta
 import ipaddress
 import json
 import re
+import threading
+import weakref
 
+from django.core.cache import cache
 from django.utils import timezone
 from django.db import transaction
 from asgiref.sync import sync_to_async
@@ -14,15 +17,81 @@ from .models import APIConfiguration, IPReputationRecord
 logger = logging.getLogger(__name__)
 
 
+def ip_reputation_cache_key(ip):
+    """Cache key holding the formatted reputation response for an IP"""
+    return f'ipreps:{ip}'
+
+
+_service = None
+_service_loop = None
+_service_lock = threading.Lock()
+
+
+def get_ip_reputation_service():
+    """
+    Return the process-wide IPReputationService, so its pooled HTTP
+    sessions (and their keep-alive connections) are reused across requests
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = IPReputationService()
+    return _service
+
+
+def _get_service_loop():
+    """Start (once) the background event loop used by run_sync"""
+    global _service_loop
+    if _service_loop is None:
+        with _service_lock:
+            if _service_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name='ip-reputation-loop',
+                    daemon=True
+                ).start()
+                _service_loop = loop
+    return _service_loop
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from synchronous code on the long-lived service loop.
+
+    Unlike asyncio.run, the loop is not torn down after each call, so the
+    aiohttp session bound to it keeps its connections alive.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_service_loop()).result()
+
+
 class IPReputationService:
     """
     Service for checking IP reputation across multiple sources
     """
     CACHE_DURATION = timedelta(hours=6)  # Cache results for 6 hours
+    RESULT_CACHE_TIMEOUT = 3600  # Seconds a formatted response stays in the Django cache
     
     def __init__(self):
-        # Sources are loaded dynamically when needed
-        pass
+        # Sources are loaded dynamically when needed.
+        # aiohttp sessions are bound to an event loop, so keep one per loop.
+        self._sessions = weakref.WeakKeyDictionary()
+    
+    def _get_session(self):
+        """Return the pooled HTTP session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=200,
+                limit_per_host=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[loop] = session
+        return session
     
     async def check_ip_reputation(self, ip):
         """
@@ -33,10 +102,18 @@ class IPReputationService:
             logger.warning(f"Invalid IP format: {ip}")
             return {"error": "Invalid IP format"}
         
+        # Serve from the application cache when possible (invalidated on record changes)
+        cache_key = ip_reputation_cache_key(ip)
+        cached_response = await cache.aget(cache_key)
+        if cached_response is not None:
+            return cached_response
+        
         # Check if we have recent data in the database
         existing_record = await self._get_cached_record(ip)
         if existing_record:
-            return self._format_record_response(existing_record)
+            response = self._format_record_response(existing_record)
+            await cache.aset(cache_key, response, self.RESULT_CACHE_TIMEOUT)
+            return response
             
         # If not in cache or cache expired, check external sources
         results = await self._check_external_sources(ip)
@@ -44,7 +121,32 @@ class IPReputationService:
         # Save results to database
         record = await self._save_reputation_data(ip, results)
         
-        return self._format_record_response(record)
+        response = self._format_record_response(record)
+        if "error" not in response:
+            await cache.aset(cache_key, response, self.RESULT_CACHE_TIMEOUT)
+        return response
+    
+    async def check_ip_reputations(self, ips):
+        """
+        Check the reputation of several IPs concurrently.
+        Results are returned in input order; a failed check yields its exception.
+        """
+        return await asyncio.gather(
+            *(self.check_ip_reputation(ip) for ip in ips),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    def is_public_ip(ip):
+        """
+        Check if the string is a globally routable IP address.
+        Private, loopback, link-local, multicast and reserved ranges are
+        never worth an upstream reputation lookup.
+        """
+        try:
+            return ipaddress.ip_address(ip).is_global
+        except ValueError:
+            return False
     
     def _is_valid_ip(self, ip):
         """Check if the provided string is a valid IP address"""
@@ -291,13 +393,13 @@ class IPReputationService:
             # Prepare request based on source name and configuration
             headers, url, params = self._prepare_request(ip, source_name, config)
             
-            async with aiohttp.ClientSession() as session:
-                if params:
-                    async with session.get(url, headers=headers, params=params) as response:
-                        return await self._process_response(response, source_name)
-                else:
-                    async with session.get(url, headers=headers) as response:
-                        return await self._process_response(response, source_name)
+            session = self._get_session()
+            if params:
+                async with session.get(url, headers=headers, params=params) as response:
+                    return await self._process_response(response, source_name)
+            else:
+                async with session.get(url, headers=headers) as response:
+                    return await self._process_response(response, source_name)
                         
         except Exception as e:
             logger.error(f"Error making API request to {source_name}: {e}")
@@ -1,16 +1,53 @@
-import asyncio
-import json
 import logging
 import re
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django_q.tasks import async_task
 from event.models import Event
-from .services import IPReputationService
+from .models import APIConfiguration, IPReputationRecord
+from .services import IPReputationService, ip_reputation_cache_key
+from .tasks import enrich_event_task
+from .utils_config import invalidate_api_cache
 
 logger = logging.getLogger(__name__)
 
-# IP extraction pattern (IPv4 only for simplicity, could be expanded)
-IP_PATTERN = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
+# IP extraction pattern (IPv4 only for simplicity, could be expanded).
+# Compiled once; each octet is validated inside the pattern (0-255, no
+# leading zeros), so candidates such as 999.1.1.1 or 01.2.3.4 are rejected
+# during the scan.
+_OCTET = r'(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])'
+IP_PATTERN = re.compile(r'\b(?:' + _OCTET + r'\.){3}' + _OCTET + r'\b', re.ASCII)
+
+
+def _iter_strings(data):
+    """Yield every string (keys and values) found in a JSON-like structure"""
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(key, str):
+                yield key
+            yield from _iter_strings(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from _iter_strings(item)
+
+
+def extract_ip_addresses(data):
+    """
+    Extract the unique IPv4 addresses found in the string leaves of event data,
+    without serializing the whole payload
+    """
+    ip_addresses = set()
+    for text in _iter_strings(data):
+        # An IPv4 address needs at least three dots; skip the scan otherwise
+        if text.count('.') >= 3:
+            ip_addresses.update(IP_PATTERN.findall(text))
+    return ip_addresses
+
 
 @receiver(post_save, sender=Event)
 def enrich_event_with_ip_reputation(sender, instance, created, **kwargs):
@@ -28,48 +65,55 @@ def enrich_event_with_ip_reputation(sender, instance, created, **kwargs):
     try:
         # Extract IP addresses from event data
         data = instance.data
-        all_data = json.dumps(data)
-        ip_addresses = set(re.findall(IP_PATTERN, all_data))
+        ip_addresses = extract_ip_addresses(data)
+        
+        # Private and reserved addresses have no public reputation to look up
+        ip_addresses = {ip for ip in ip_addresses if IPReputationService.is_public_ip(ip)}
         
         if not ip_addresses:
-            logger.debug(f"No IP addresses found in event {instance.id}")
+            logger.debug(f"No public IP addresses found in event {instance.id}")
             return
             
-        logger.info(f"Found {len(ip_addresses)} IP addresses in event {instance.id}")
+        # Bound the worst case: cap the number of IPs checked per event
+        max_ips = getattr(settings, 'IP_ENRICH_MAX', 50)
+        if len(ip_addresses) > max_ips:
+            logger.warning(
+                f"Event {instance.id} contains {len(ip_addresses)} public IP addresses, "
+                f"only the first {max_ips} will be checked"
+            )
+        ips = sorted(ip_addresses)[:max_ips]
+            
+        logger.info(f"Found {len(ips)} IP addresses to check in event {instance.id}")
         
-        # Check reputation for each IP
-        service = IPReputationService()
-        malicious_ips = []
+        # Large IP sets are checked by the Django-Q2 worker so the saving request is not blocked
+        if len(ips) > getattr(settings, 'IP_ENRICH_ASYNC_THRESHOLD', 10):
+            event_id = instance.id
+            transaction.on_commit(
+                lambda: async_task('ip_reputation.tasks.enrich_event_task', event_id, ips)
+            )
+            logger.info(f"Queued IP reputation enrichment of event {instance.id}")
+            return
         
-        for ip in ip_addresses:
-            # Use asyncio to run the async method
-            result = asyncio.run(service.check_ip_reputation(ip))
-            if result.get('is_malicious'):
-                malicious_ips.append({
-                    'ip': ip,
-                    'reputation': result
-                })
+        ip_reputation = enrich_event_task(instance.id, ips)
         
-        # If malicious IPs found, enrich the event data
-        if malicious_ips:
-            logger.info(f"Found {len(malicious_ips)} malicious IPs in event {instance.id}")
-            
-            # Add IP reputation data to event 
-            if 'attributes' not in data:
-                data['attributes'] = {}
-                
-            if 'cti4bc_enrichment' not in data['attributes']:
-                data['attributes']['cti4bc_enrichment'] = {}
-                
-            data['attributes']['cti4bc_enrichment']['ip_reputation'] = {
-                'malicious_ips': malicious_ips,
-                'summary': f"Found {len(malicious_ips)} malicious IP addresses"
-            }
-            
-            # Update event without triggering the signal again
-            Event.objects.filter(id=instance.id).update(data=data)
-            
-            logger.info(f"Event {instance.id} enriched with IP reputation data")
+        if ip_reputation:
+            # Keep the in-memory instance consistent with the stored data
+            enrichment = data.setdefault('attributes', {}).setdefault('cti4bc_enrichment', {})
+            enrichment['ip_reputation'] = ip_reputation
         
     except Exception as e:
         logger.error(f"Error enriching event {instance.id} with IP reputation: {str(e)}")
+
+
+@receiver(post_save, sender=IPReputationRecord)
+@receiver(post_delete, sender=IPReputationRecord)
+def invalidate_ip_reputation_cache(sender, instance, **kwargs):
+    """Drop the cached reputation response when its record changes"""
+    cache.delete(ip_reputation_cache_key(instance.ip_address))
+
+
+@receiver(post_save, sender=APIConfiguration)
+@receiver(post_delete, sender=APIConfiguration)
+def invalidate_api_configuration_cache(sender, instance, **kwargs):
+    """Drop the cached API configurations when one of them changes"""
+    invalidate_api_cache()
@@ -0,0 +1,82 @@
+"""
+IP reputation enrichment of events.
+
+`enrich_event_task` runs inline from the Event post_save signal for small IP
+sets, and in the Django-Q2 `qcluster` worker for large ones.
+"""
+import logging
+
+from django.db.models import F, Func, JSONField, Value
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Coalesce
+
+from event.models import Event
+from .services import get_ip_reputation_service, run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class JSONBSet(Func):
+    """Postgres jsonb_set(target, path, value, create_missing => true)"""
+    function = 'jsonb_set'
+    output_field = JSONField()
+    
+    def __init__(self, target, path, value):
+        super().__init__(target, Value(path), value, Value(True))
+
+
+def _with_ip_reputation(ip_reputation):
+    """
+    Expression setting data.attributes.cti4bc_enrichment.ip_reputation in the
+    database, creating the missing parent objects on the way
+    """
+    empty = Value({}, output_field=JSONField())
+    attributes = KeyTransform('attributes', 'data')
+    enrichment = KeyTransform('cti4bc_enrichment', attributes)
+    data = JSONBSet(F('data'), ['attributes'], Coalesce(attributes, empty))
+    data = JSONBSet(data, ['attributes', 'cti4bc_enrichment'], Coalesce(enrichment, empty))
+    return JSONBSet(
+        data,
+        ['attributes', 'cti4bc_enrichment', 'ip_reputation'],
+        Value(ip_reputation, output_field=JSONField())
+    )
+
+
+def enrich_event_task(event_id, ip_addresses):
+    """
+    Check the reputation of the given IPs and, if any is malicious, store the
+    findings under data.attributes.cti4bc_enrichment.ip_reputation of the event.
+    Returns the stored enrichment, or None if no malicious IP was found.
+    """
+    # Check reputation for all IPs concurrently in a single event loop
+    service = get_ip_reputation_service()
+    ips = list(ip_addresses)
+    results = run_sync(service.check_ip_reputations(ips))
+    malicious_ips = []
+    
+    for ip, result in zip(ips, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error checking IP reputation for {ip}: {result}")
+            continue
+        if result.get('is_malicious'):
+            malicious_ips.append({
+                'ip': ip,
+                'reputation': result
+            })
+    
+    if not malicious_ips:
+        return None
+    
+    logger.info(f"Found {len(malicious_ips)} malicious IPs in event {event_id}")
+    
+    ip_reputation = {
+        'malicious_ips': malicious_ips,
+        'summary': f"Found {len(malicious_ips)} malicious IP addresses"
+    }
+    
+    # Patch the stored JSON in place (only the enrichment is sent to the DB).
+    # update() does not fire post_save, so the signal is not triggered again.
+    Event.objects.filter(id=event_id).update(data=_with_ip_reputation(ip_reputation))
+    
+    logger.info(f"Event {event_id} enriched with IP reputation data")
+    return ip_reputation
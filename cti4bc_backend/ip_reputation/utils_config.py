@@ -1,19 +1,37 @@
 """
 Utility functions for loading API configurations from database
 """
+import time
+
 from django.core.cache import cache
 from django.db import connection
 
+# Seconds the configurations stay in the Django cache. The APIConfiguration signals
+# only clear the cache of the process that saved the row (the default cache is
+# per-process), so this bounds how long other workers keep a rotated or
+# deactivated key
+API_CONFIG_CACHE_TIMEOUT = 300
+
+# Seconds the per-process copy is trusted before going back to the Django cache
+LOCAL_CACHE_TTL = 30
+
+# First-level, per-process cache in front of the shared Django cache
+_LOCAL = {'configs': None, 'ts': 0.0}
+
 
 def get_api_configurations():
     """
     Get API configurations from database with caching
     Returns a dictionary with API configurations
     """
+    if _LOCAL['configs'] is not None and time.monotonic() - _LOCAL['ts'] < LOCAL_CACHE_TTL:
+        return _LOCAL['configs']
+    
     cache_key = 'api_configurations'
     cached_configs = cache.get(cache_key)
     
     if cached_configs is not None:
+        _store_local(cached_configs)
         return cached_configs
     
     try:
@@ -35,8 +53,9 @@ def get_api_configurations():
                     'is_active': is_active
                 }
                 
-        # Cache for 5 minutes
-        cache.set(cache_key, configs, 300)
+        # Invalidated by the APIConfiguration signals in this process, expires elsewhere
+        cache.set(cache_key, configs, API_CONFIG_CACHE_TIMEOUT)
+        _store_local(configs)
         return configs
         
     except Exception:
@@ -44,6 +63,12 @@ def get_api_configurations():
         return {}
 
 
+def _store_local(configs):
+    """Remember configurations in the per-process cache"""
+    _LOCAL['configs'] = configs
+    _LOCAL['ts'] = time.monotonic()
+
+
 def get_api_key(service_name):
     """
     Get API key for a specific service
@@ -57,4 +82,6 @@ def invalidate_api_cache():
     Invalidate the API configuration cache
     Call this when API configurations are updated
     """
+    _LOCAL['configs'] = None
+    _LOCAL['ts'] = 0.0
     cache.delete('api_configurations')
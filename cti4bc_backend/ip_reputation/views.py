@@ -3,11 +3,10 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-import asyncio
 
 from .models import APIConfiguration, IPReputationRecord
 from .serializers import APIConfigurationSerializer, IPReputationRecordSerializer
-from .services import IPReputationService
+from .services import IPReputationService, get_ip_reputation_service, run_sync
 
 
 class APIConfigurationViewSet(viewsets.ModelViewSet):
@@ -27,8 +26,14 @@ class IPReputationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = IPReputationRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Columns returned by the ?light=true summary listing
+    LIGHT_FIELDS = ('ip_address', 'is_malicious', 'last_checked')
+    
     def get_queryset(self):
-        queryset = IPReputationRecord.objects.all().order_by('-last_checked')
+        # Only load the columns the serializer actually renders
+        queryset = IPReputationRecord.objects.only(
+            *IPReputationRecordSerializer.Meta.fields
+        ).order_by('-last_checked')
         
         # Filter by IP address
         ip_address = self.request.query_params.get('ip', None)
@@ -42,6 +47,14 @@ class IPReputationViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(is_malicious=is_malicious_bool)
             
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Summary listing: plain rows straight from the DB, no model instances or serializer
+        light = request.query_params.get('light', '')
+        if light.lower() in ['true', '1', 'yes']:
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response(list(queryset.values(*self.LIGHT_FIELDS)))
+        return super().list(request, *args, **kwargs)
 
 
 class CheckIPReputationView(APIView):
@@ -54,8 +67,8 @@ class CheckIPReputationView(APIView):
         if not ip:
             return Response({"error": "No IP address provided"}, status=status.HTTP_400_BAD_REQUEST)
             
-        service = IPReputationService()
-        result = asyncio.run(service.check_ip_reputation(ip))
+        service = get_ip_reputation_service()
+        result = run_sync(service.check_ip_reputation(ip))
         
         if "error" in result:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
@@ -75,11 +88,24 @@ class BulkCheckIPReputationView(APIView):
         if not ips:
             return Response({"error": "No IP addresses provided"}, status=status.HTTP_400_BAD_REQUEST)
             
-        service = IPReputationService()
+        service = get_ip_reputation_service()
         results = {}
         
-        for ip in ips:
-            result = asyncio.run(service.check_ip_reputation(ip))
+        # Private and reserved addresses are answered without an upstream lookup.
+        # Duplicates are dropped (order preserved) so each IP is checked once.
+        public_ips = []
+        for ip in dict.fromkeys(ips):
+            if IPReputationService.is_public_ip(ip):
+                public_ips.append(ip)
+            else:
+                results[ip] = {"error": "Not a public IP address"}
+        
+        # Check every IP concurrently in a single hop to the service loop
+        checked = run_sync(service.check_ip_reputations(public_ips))
+        
+        for ip, result in zip(public_ips, checked):
+            if isinstance(result, Exception):
+                result = {"error": str(result)}
             results[ip] = result
             
         return Response(results)
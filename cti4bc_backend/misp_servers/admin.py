@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+from organizations.models import Organization
 from .models import MISPServer
 
 @admin.register(MISPServer)
@@ -7,6 +10,10 @@ class MISPServerAdmin(admin.ModelAdmin):
     list_filter = ('organizations',)
     search_fields = ('name', 'url')
 
+    def get_queryset(self, request):
+        names = Organization.objects.filter(misp_servers=OuterRef('pk')).values('name')
+        return super().get_queryset(request).annotate(_org_names=ArraySubquery(names))
+
     def get_organizations(self, obj):
-        return ", ".join([org.name for org in obj.organizations.all()])
+        return ", ".join(obj._org_names or [])
     get_organizations.short_description = 'Organizations'
@@ -5,3 +5,7 @@ class MispServersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'misp_servers'
     verbose_name = 'MISP Servers'
+
+    def ready(self):
+        # Import signals to register cache invalidation
+        import misp_servers.signals
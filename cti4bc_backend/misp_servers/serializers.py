@@ -18,4 +18,8 @@ class MISPServerSerializer(serializers.ModelSerializer):
         }
     
     def get_organization_names(self, obj):
+        # Use the names aggregated by the queryset when available (see with_organization_names)
+        org_names = getattr(obj, '_org_names', None)
+        if org_names is not None:
+            return org_names
         return [org.name for org in obj.organizations.all()]
\ No newline at end of file
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import MISPServer
+from .utils import invalidate_for_event_cache
+
+
+@receiver(post_save, sender=MISPServer)
+@receiver(post_delete, sender=MISPServer)
+@receiver(m2m_changed, sender=MISPServer.organizations.through)
+def invalidate_misp_server_caches(sender, **kwargs):
+    """
+    Drop cached for-event server lists when a server or its organizations change
+    """
+    invalidate_for_event_cache()
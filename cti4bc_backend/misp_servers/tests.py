@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from organizations.models import Organization
+from .models import MISPServer
+
+
+class MISPServerUpdateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.org_a = Organization.objects.create(name='Org A', external_id='1', prefix='UC1')
+        self.org_b = Organization.objects.create(name='Org B', external_id='2', prefix='UC2')
+        self.server = MISPServer.objects.create(name='MISP', url='https://misp.example.com', apikey='key')
+        self.server.organizations.set([self.org_a])
+
+    def test_update_returns_new_organization_names(self):
+        url = reverse('misp-server-detail', args=[self.server.pk])
+        response = self.client.patch(url, {'organizations': [self.org_b.pk]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['organizations'], [self.org_b.pk])
+        self.assertEqual(response.data['organization_names'], ['Org B'])
@@ -0,0 +1,45 @@
+"""
+Query and caching helpers for MISP server lookups
+"""
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.cache import cache
+from django.db.models import OuterRef, Prefetch
+from organizations.models import Organization
+
+# Seconds a serialized for-event server list stays cached
+FOR_EVENT_CACHE_TIMEOUT = 300
+
+# Generation counter: bumping it orphans every cached for-event list at once,
+# which works on any cache backend (no pattern deletion needed)
+_FOR_EVENT_GENERATION_KEY = 'misp:for_event:generation'
+
+
+def with_organization_names(queryset):
+    """
+    Annotate MISP servers with `_org_names`, the list of their organization names,
+    computed by the database in the same query (independent of outer filters).
+    Organization ids are still prefetched, but only the id column is loaded.
+    """
+    names = Organization.objects.filter(misp_servers=OuterRef('pk')).values('name')
+    return queryset.annotate(_org_names=ArraySubquery(names)).prefetch_related(
+        Prefetch('organizations', queryset=Organization.objects.only('id'))
+    )
+
+
+def for_event_cache_key(organization_id):
+    """
+    Cache key for the MISP servers available to events of an organization
+    """
+    generation = cache.get(_FOR_EVENT_GENERATION_KEY, 0)
+    return f'misp:for_event:{generation}:{organization_id}'
+
+
+def invalidate_for_event_cache():
+    """
+    Invalidate every cached for-event server list
+    Call this when MISP servers or their organizations change
+    """
+    try:
+        cache.incr(_FOR_EVENT_GENERATION_KEY)
+    except ValueError:
+        cache.set(_FOR_EVENT_GENERATION_KEY, 1, None)
@@ -1,9 +1,12 @@
 from django.shortcuts import render, get_object_or_404
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import MISPServer
 from .serializers import MISPServerSerializer
+from .utils import FOR_EVENT_CACHE_TIMEOUT, for_event_cache_key, with_organization_names
 from event.models import Event
 
 class MISPServerViewSet(viewsets.ModelViewSet):
@@ -20,8 +23,21 @@ class MISPServerViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         if user.is_superuser:
-            return MISPServer.objects.all()
-        return MISPServer.objects.filter(organizations__in=user.organizations.all()).distinct()
+            return with_organization_names(MISPServer.objects.all())
+        # Semi-join on the M2M table instead of JOIN + DISTINCT over every column
+        user_server_links = MISPServer.organizations.through.objects.filter(
+            mispserver_id=OuterRef('pk'),
+            organization_id__in=user.organizations.values('pk')
+        )
+        return with_organization_names(
+            MISPServer.objects.filter(Exists(user_server_links))
+        )
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # The instance was loaded with the names annotated before the update: drop
+        # them so the response lists the organizations as saved
+        serializer.instance.__dict__.pop('_org_names', None)
     
     @action(detail=False, methods=['get'], url_path='for-event/(?P<event_id>[^/.]+)')
     def for_event(self, request, event_id=None):
@@ -38,14 +54,24 @@ class MISPServerViewSet(viewsets.ModelViewSet):
             event = Event.objects.get(id=event_id)
             
             # Check permissions
-            if not user.is_staff and not user.organizations.filter(id=event.organization.id).exists():
+            if not user.is_staff and not user.organizations.filter(id=event.organization_id).exists():
                 return Response({"error": "You don't have access to this event"}, status=403)
             
+            # The server list only depends on the event's organization, so it is
+            # cached per organization (invalidated when MISP servers change)
+            cache_key = for_event_cache_key(event.organization_id)
+            cached_data = cache.get(cache_key)
+            if cached_data is not None:
+                return Response(cached_data)
+            
             # Get MISP servers from the same organization as the event
-            misp_servers = MISPServer.objects.filter(organizations=event.organization)
+            misp_servers = with_organization_names(
+                MISPServer.objects.filter(organizations=event.organization_id)
+            )
             
             # Serialize the data and return the response
             serializer = self.get_serializer(misp_servers, many=True)
+            cache.set(cache_key, serializer.data, FOR_EVENT_CACHE_TIMEOUT)
             return Response(serializer.data)
             
         except Event.DoesNotExist:
@@ -0,0 +1,14 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Organization
+from .views import ORGANIZATIONS_SUMMARY_CACHE_KEY
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organizations_summary(sender, instance, **kwargs):
+    """
+    Drop the cached organizations summary when an organization changes
+    """
+    cache.delete(ORGANIZATIONS_SUMMARY_CACHE_KEY)
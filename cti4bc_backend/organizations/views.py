@@ -3,8 +3,13 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.cache import cache
 from .models import Organization
 
+# Cached id/name list served by OrganizationsSummaryView (invalidated in signals.py)
+ORGANIZATIONS_SUMMARY_CACHE_KEY = 'orgs:summary'
+ORGANIZATIONS_SUMMARY_CACHE_TIMEOUT = 300
+
 class OrganizationListView(APIView):
     """
     API View to list all organizations
@@ -43,6 +48,8 @@ class OrganizationsSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        organizations = Organization.objects.only('id', 'name').order_by('name')
-        data = [{'id': org.id, 'name': org.name} for org in organizations]
-        return Response({'organizations': data}, status=status.HTTP_200_OK)
\ No newline at end of file
+        data = cache.get(ORGANIZATIONS_SUMMARY_CACHE_KEY)
+        if data is None:
+            data = list(Organization.objects.order_by('name').values('id', 'name'))
+            cache.set(ORGANIZATIONS_SUMMARY_CACHE_KEY, data, ORGANIZATIONS_SUMMARY_CACHE_TIMEOUT)
+        return Response({'organizations': data}, status=status.HTTP_200_OK)
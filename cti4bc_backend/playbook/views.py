@@ -9,9 +9,29 @@ from rest_framework import status
 from .models import Playbook
 from .serializers import PlaybookSerializer
 from event.models import Event
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
 import re
 
+# Extracts the event external id from a SOAR playbook id ("playbook--<event id>")
+_PLAYBOOK_RE = re.compile(r"playbook--(.+)")
+
+def _soar_node_value(node_id, node):
+    """Builds the attribute value describing a workflow node."""
+    value = f"Node ID: {node_id}, Name: {node.get('name', 'Unknown')}, Type: {node.get('type', 'Unknown')}"
+    # Add additional relationships for actions
+    if node.get('type') == 'action':
+        commands = ", ".join(cmd.get("type", "unknown") for cmd in node.get("commands") or ())
+        value += f", Commands: {commands}, Agent: {node.get('agent', 'unknown agent')}"
+    return value
+
+def _soar_node_comment(node):
+    """Builds the attribute comment for a workflow node, including the next step if present."""
+    comment = f"Workflow step details: {node.get('description', 'No description available')}"
+    if "on_completion" in node:
+        comment += f" Next step: {node['on_completion']}"
+    return comment
+
 def preprocess_soar_message_into_attributes(data):
     """
     Parses the SOAR4BC message of a cacao v2 playbook into MISP attributes.
@@ -20,32 +40,44 @@ def preprocess_soar_message_into_attributes(data):
     Returns:
         list: A list of MISP attributes.
     """
-    attributes = []
-    workflow = data.get('workflow', [])
-    for node_id, node in workflow.items():
-        attribute = {
+    workflow = data.get('workflow') or {}
+    return [
+        {
             'type': 'text',
             'category': 'Internal reference',
-            'value': f"Node ID: {node_id}, Name: {node.get('name', 'Unknown')}, Type: {node.get('type', 'Unknown')}",
-            'comment': f"Workflow step details: {node.get('description', 'No description available')}",
+            'value': _soar_node_value(node_id, node),
+            'comment': _soar_node_comment(node),
             'to_ids': False
         }
+        for node_id, node in workflow.items()
+    ]
 
-        # Add additional relationships for actions
-        if node.get('type') == 'action':
-            commands = ", ".join(
-                cmd.get("type", "unknown") for cmd in node.get("commands", [])
-            )
-            agent = node.get("agent", "unknown agent")
-            attribute["value"] += f", Commands: {commands}, Agent: {agent}"
-        
-        # Add the next step, if present
-        if "on_completion" in node:
-            attribute["comment"] += f" Next step: {node['on_completion']}"
-
-        attributes.append(attribute)
-     
-    return attributes
+def _save_playbook(external_id, event_external_id, data):
+    """
+    Creates or updates the playbook with the given external id in a single transaction,
+    linking it to its event (by id only, without loading the Event row) if not linked yet.
+    Returns:
+        bool: True if the playbook was created.
+    """
+    with transaction.atomic():
+        playbook, created = Playbook.objects.select_for_update().get_or_create(
+            external_id=external_id, defaults={'data': data}
+        )
+        update_fields = []
+        if not created:
+            playbook.data = data
+            update_fields.append('data')
+
+        # Check if the event exists and assign it to the playbook
+        if playbook.event_id is None and event_external_id is not None:
+            event_id = Event.objects.filter(external_id=event_external_id).values_list('id', flat=True).first()
+            if event_id is not None:
+                playbook.event_id = event_id
+                update_fields.append('event')
+
+        if update_fields:
+            playbook.save(update_fields=update_fields + ['updated_at'])
+    return created
 
 class PlaybokCreateUpdateView(APIView):
     permission_classes = [IsAuthenticated]
@@ -56,16 +88,7 @@ class PlaybokCreateUpdateView(APIView):
             return Response({"message": "Invalid data"}, status=status.HTTP_400_BAD_REQUEST)
         processed_data = preprocess_soar_message_into_attributes(request.data)
 
-        playbook, created = Playbook.objects.get_or_create(external_id=external_id)
-        playbook.data = processed_data
-
-        if not playbook.event:
-            try:
-                event = Event.objects.get(external_id=external_id)
-                playbook.event = event
-            except Event.DoesNotExist:
-                pass
-        playbook.save()
+        created = _save_playbook(external_id, external_id, processed_data)
         message = "Playbook created" if created else "Playbook updated"
         return Response({"message": message}, status=status.HTTP_200_OK)
 
@@ -112,21 +135,11 @@ def new_playbook(message, topic):
     
     # Get external id from the message
     playbook_id = json_message.get('id')
-    match = re.match(r"playbook--(.+)", playbook_id)
+    match = _PLAYBOOK_RE.match(playbook_id)
     event_external_id = match.group(1) if match else None
 
     playbook_data = preprocess_soar_message_into_attributes(json_message)
 
-    playbook, created = Playbook.objects.get_or_create(external_id=playbook_id)
-    playbook.data = playbook_data
-
-    # Check if the event exists and assign it to the playbook
-    if not playbook.event:
-        try:
-            event = Event.objects.get(external_id=event_external_id)
-            playbook.event = event
-        except Event.DoesNotExist:
-            pass
-    playbook.save()
+    _save_playbook(playbook_id, event_external_id, playbook_data)
     return Response({"message": message}, status=status.HTTP_200_OK)
 
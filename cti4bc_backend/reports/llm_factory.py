@@ -7,12 +7,15 @@ consistent across all workers (Gunicorn + qcluster), removes the hardcoded .env
 and avoids read-modify-write races on the .env file.
 """
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 from django.conf import settings
 
 from .services import GeminiService
-from .ollama_service import OllamaService
+from .ollama_service import OllamaService, invalidate_resolved_config
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +25,25 @@ class LLMProviderFactory:
 
     # Per-process cache of service instances. Keys embed the DB-backed config
     # (provider, and model for Ollama), so a configuration change made on any worker
-    # is picked up by every worker on its next request (different key -> new instance).
+    # is picked up by every worker on its next generation (different key -> new instance).
     _service_cache = {}
+    # Guards construction so concurrent cold requests build each service only once
+    _cache_lock = threading.Lock()
+
+    # Resolved (time.monotonic() deadline, provider, model), so the read-only status
+    # views do not query LLMConfig on every request. Reset by reload_configuration in
+    # the process that made the change; other processes re-read it after
+    # CONFIG_CACHE_TTL seconds. Generation paths never use it: they always read
+    # LLMConfig (fresh=True), so no worker sends data to a provider the admin has
+    # just switched away from.
+    _resolved = None
+    CONFIG_CACHE_TTL = 30  # seconds
+
+    # Recent test_provider results: provider -> (time.monotonic() deadline, result).
+    # Failures are kept too, so a status page polling an unreachable backend does not
+    # wait on a connection timeout for every request. Reset by reload_configuration.
+    _test_results = {}
+    PROVIDER_TEST_TTL = 5  # seconds
 
     SUPPORTED_PROVIDERS = {
         'gemini': GeminiService,
@@ -32,8 +52,18 @@ class LLMProviderFactory:
 
     @classmethod
     def reload_configuration(cls):
-        """Clear the per-process service cache so the next call rebuilds from DB config."""
-        cls._service_cache.clear()
+        """
+        Clear the per-process service cache so the next call rebuilds from DB config,
+        and start a new configuration generation so memoized env/settings values are re-read.
+        """
+        with cls._cache_lock:
+            cls._resolved = None
+            # Rebind rather than clear: in-flight callers keep their instance, whose
+            # pooled HTTP client is closed by its finalizer once the last reference
+            # goes away (closing it here would abort a generation running in another thread)
+            cls._service_cache = {}
+            cls._test_results = {}
+        invalidate_resolved_config()
         logger.info("LLM service cache cleared; configuration will be re-read from the database")
 
     # ------------------------------------------------------------------ config
@@ -45,14 +75,40 @@ class LLMProviderFactory:
         return LLMConfig.load()
 
     @classmethod
-    def _get_llm_provider(cls) -> str:
-        """Get the currently configured provider from the database."""
-        provider = (cls._config().provider or 'gemini').lower()
+    def _resolve_configuration(cls, fresh: bool = False) -> tuple:
+        """
+        Return the configured ``(provider, model)``. LLMConfig is loaded at most once
+        per TTL, or on every call when ``fresh`` is set.
+        """
+        resolved = cls._resolved
+        if not fresh and resolved is not None and resolved[0] > time.monotonic():
+            return resolved[1], resolved[2]
+        cfg = cls._config()
+        provider = cls._get_llm_provider(cfg)
+        model = cls._get_model(provider, cfg)
+        cls._resolved = (time.monotonic() + cls.CONFIG_CACHE_TTL, provider, model)
+        return provider, model
+
+    @classmethod
+    def _get_llm_provider(cls, cfg=None) -> str:
+        """Get the currently configured provider (from an already loaded config when given)."""
+        if cfg is None:
+            return cls._resolve_configuration()[0]
+        provider = (cfg.provider or 'gemini').lower()
         if provider not in cls.SUPPORTED_PROVIDERS:
             logger.warning("Unsupported LLM provider '%s', falling back to 'gemini'", provider)
             provider = 'gemini'
         return provider
 
+    @classmethod
+    def _get_model(cls, provider: str, cfg) -> str:
+        """Resolve the model of ``provider`` from an already loaded config."""
+        if provider == 'ollama':
+            return cfg.ollama_model or 'llama3.1:8b'
+        elif provider == 'gemini':
+            return getattr(settings, 'GEMINI_MODEL', None) or 'gemini-1.5-flash'
+        return 'unknown'
+
     @classmethod
     def get_available_providers(cls) -> list:
         """Get list of available LLM providers"""
@@ -66,12 +122,15 @@ class LLMProviderFactory:
     @classmethod
     def get_current_model(cls) -> str:
         """Get the currently configured model for the current provider"""
-        provider = cls._get_llm_provider()
-        if provider == 'ollama':
-            return cls._config().ollama_model or 'llama3.1:8b'
-        elif provider == 'gemini':
-            return getattr(settings, 'GEMINI_MODEL', None) or 'gemini-1.5-flash'
-        return 'unknown'
+        return cls._resolve_configuration()[1]
+
+    @classmethod
+    def get_current_configuration(cls, fresh: bool = False) -> tuple:
+        """
+        Get the currently configured ``(provider, model)`` with a single config lookup
+        (bypassing the per-process memo when ``fresh`` is set).
+        """
+        return cls._resolve_configuration(fresh)
 
     # ---------------------------------------------------------------- services
 
@@ -86,49 +145,73 @@ class LLMProviderFactory:
                        is selected and fails, we do not quietly send data to Gemini
                        (cloud). The caller (async task) records the failure instead.
         """
-        provider = cls._get_llm_provider()
+        return cls._get_provider_service(cls._resolve_configuration(fresh=True)[0])
 
-        if provider in cls._service_cache:
-            return cls._service_cache[provider]
+    @classmethod
+    def _get_cached_service(cls, cache_key: str, create):
+        """Return the service cached under ``cache_key``, building it with ``create()`` at most once."""
+        service = cls._service_cache.get(cache_key)
+        if service is not None:
+            return service
+        with cls._cache_lock:
+            # Another thread may have built it while we waited
+            service = cls._service_cache.get(cache_key)
+            if service is None:
+                service = create()
+                cls._service_cache[cache_key] = service
+        return service
 
-        service_class = cls.SUPPORTED_PROVIDERS[provider]
-        service_instance = service_class()
-        cls._service_cache[provider] = service_instance
-        logger.info("Successfully initialized %s LLM service", provider)
-        return service_instance
+    @classmethod
+    def _get_provider_service(cls, provider: str) -> Union[GeminiService, OllamaService]:
+        """Get the cached default service instance of ``provider``."""
+        def create():
+            service_instance = cls.SUPPORTED_PROVIDERS[provider]()
+            logger.info("Successfully initialized %s LLM service", provider)
+            return service_instance
+
+        return cls._get_cached_service(provider, create)
 
     @classmethod
     def get_llm_service_with_model(cls, custom_model: str = None) -> Union[GeminiService, OllamaService]:
         """Get an LLM service instance, optionally with a specific Ollama model (no fallback)."""
-        provider = cls._get_llm_provider()
-        service_class = cls.SUPPORTED_PROVIDERS[provider]
+        provider = cls._resolve_configuration(fresh=True)[0]
 
         if provider == 'ollama' and custom_model:
-            logger.info("Creating Ollama service with model: %s", custom_model)
-            return service_class(custom_model=custom_model)
+            return cls._get_ollama_service(custom_model)
+
+        # Shared per-process instance (GeminiService configures the SDK and model once)
+        return cls._get_provider_service(provider)
 
-        logger.info("Creating %s service with default configuration", provider)
-        return service_class()
+    @classmethod
+    def _get_ollama_service(cls, model: str) -> OllamaService:
+        """Get the cached Ollama service instance for ``model``."""
+        def create():
+            logger.info("Creating Ollama service with model: %s", model)
+            return OllamaService(custom_model=model)
+
+        return cls._get_cached_service(f"ollama_{model}", create)
 
     @classmethod
-    def get_configured_llm_service(cls) -> Union[GeminiService, OllamaService]:
-        """Get an LLM service instance for the currently configured provider and model."""
-        provider = cls._get_llm_provider()
+    def get_ollama_service(cls) -> OllamaService:
+        """Get the shared default Ollama service (model listing, status checks), whatever the provider."""
+        return cls._get_provider_service('ollama')
+
+    @classmethod
+    def get_configured_llm_service(cls, configuration: tuple = None) -> Union[GeminiService, OllamaService]:
+        """
+        Get an LLM service instance for the configured provider and model: the given
+        ``(provider, model)`` or, by default, LLMConfig as currently stored.
+        """
+        provider, current_model = configuration or cls.get_current_configuration(fresh=True)
 
         if provider == 'ollama':
-            current_model = cls.get_current_model()
-            cache_key = f"{provider}_{current_model}"
-            if cache_key in cls._service_cache:
-                return cls._service_cache[cache_key]
-            service = cls.get_llm_service_with_model(current_model)
-            cls._service_cache[cache_key] = service
-            return service
+            return cls._get_ollama_service(current_model)
 
-        return cls.get_llm_service()
+        return cls._get_provider_service(provider)
 
     @classmethod
     def test_provider(cls, provider_name: str) -> dict:
-        """Test if a provider can be initialised successfully."""
+        """Test if a provider can be initialised successfully (result reused for PROVIDER_TEST_TTL seconds)."""
         if provider_name not in cls.SUPPORTED_PROVIDERS:
             return {
                 'success': False,
@@ -136,9 +219,34 @@ class LLMProviderFactory:
                 'available_providers': cls.get_available_providers()
             }
 
+        cached = cls._test_results.get(provider_name)
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        result = cls._run_provider_test(provider_name)
+        cls._test_results[provider_name] = (time.monotonic() + cls.PROVIDER_TEST_TTL, result)
+        return dict(result)
+
+    @classmethod
+    def test_providers(cls, provider_names) -> dict:
+        """
+        Test several providers concurrently and return ``{provider: result}``; the
+        total wait is that of the slowest probe rather than the sum of them.
+        """
+        provider_names = list(provider_names)
+        if len(provider_names) <= 1:
+            return {name: cls.test_provider(name) for name in provider_names}
+        with ThreadPoolExecutor(max_workers=len(provider_names)) as executor:
+            return dict(zip(provider_names, executor.map(cls.test_provider, provider_names)))
+
+    @classmethod
+    def _run_provider_test(cls, provider_name: str) -> dict:
+        """Initialise ``provider_name`` and probe its backend."""
         try:
-            service_class = cls.SUPPORTED_PROVIDERS[provider_name]
-            service_instance = service_class()
+            # Reuse the cached default instance (and its pooled HTTP client)
+            service_instance = cls._get_provider_service(provider_name)
+            if hasattr(service_instance, 'verify_connection'):
+                service_instance.verify_connection()
 
             extra_info = {}
             if hasattr(service_instance, 'get_available_models'):
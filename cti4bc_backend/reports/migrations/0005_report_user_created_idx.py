@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0004_backfill_report_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["user", "-created_at"], name="report_user_created_idx"
+            ),
+        ),
+    ]
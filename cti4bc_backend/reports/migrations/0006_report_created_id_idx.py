@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-16 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0005_report_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="report_created_id_idx"
+            ),
+        ),
+    ]
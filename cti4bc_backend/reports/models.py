@@ -39,12 +39,22 @@ class Report(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # User-scoped listing, newest first
+            models.Index(fields=['user', '-created_at'], name='report_user_created_idx'),
+            # Unscoped (staff) listing in the cursor pagination order
+            models.Index(fields=['-created_at', '-id'], name='report_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
     @property
     def events_count(self):
+        # Use the count annotated by list queries (see reports.utils.with_events_count)
+        annotated = getattr(self, '_events_count', None)
+        if annotated is not None:
+            return annotated
         return self.events.count()
 
 
@@ -1,32 +1,173 @@
+import functools
+import hashlib
 import httpx
 import json
 import time
 import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from decouple import config
+from django.core.cache import cache
+from cti4bc_backend.env import config
 from event.models import Event
-from typing import List, Dict, Any
+from .utils import build_events_context
+from typing import List, Dict, Any, Iterator, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import tiktoken
+except ImportError:  # optional, falls back to the character-count heuristic
+    tiktoken = None
+
+SYSTEM_PROMPT = """You are a cybersecurity analyst expert in CTI (Cyber Threat Intelligence). 
+Your task is to analyze security events and generate professional reports based on the provided data.
+
+Please provide your analysis in a clear, structured format using markdown.
+Focus on actionable insights and recommendations.
+Be concise but thorough in your analysis."""
+
+# Built once at import; only the events context and user request vary per call.
+# The events come before the user request so that regenerating a report over the
+# same events keeps the longest possible identical prompt prefix (provider-side
+# prompt/KV caches reuse it).
+PROMPT_TEMPLATE = SYSTEM_PROMPT + """
+
+EVENTS DATA TO ANALYZE:
+{events_context}
+
+USER REQUEST:
+{user_prompt}
+
+Please generate a comprehensive report based on the above information."""
+
+# Shared request timeouts (httpx sets the JSON Content-Type itself for json= bodies)
+CONNECT_TIMEOUT = 10.0
+SHORT_TIMEOUT = httpx.Timeout(10.0)  # /api/version and status probes
+MODELS_TIMEOUT = httpx.Timeout(30.0, connect=CONNECT_TIMEOUT)  # /api/tags
+
+# /api/generate options (shared, never mutated)
+DEFAULT_MODEL_OPTIONS = {
+    "temperature": 0.7,
+    "num_predict": 2048,  # Max tokens to generate
+    "top_p": 0.9,
+    "top_k": 40
+}
+
+# For larger models, reduce some parameters to improve performance
+LARGE_MODEL_SIZES = ('34b', '27b', '70b', '32b')
+LARGE_MODEL_OPTIONS = {
+    **DEFAULT_MODEL_OPTIONS,
+    "num_predict": 1500,  # Slightly reduce max tokens for faster generation
+    "top_k": 20,  # Reduce top_k for more focused responses
+    "temperature": 0.5  # Lower temperature for more consistent responses
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _get_tokenizer(model):
+    """
+    Return a tiktoken encoding for ``model`` (cl100k_base for models tiktoken does not know),
+    or None when tiktoken is unavailable or its encoding files cannot be loaded.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding, using character-count estimate: {e}")
+        return None
+
+
+# Resolved environment/settings values, as {name: (generation, value)}.
+# Bumping the generation (see invalidate_resolved_config) makes every entry stale.
+_resolved_config = {}
+_config_generation = 0
+
+
+def invalidate_resolved_config():
+    """Force the Ollama URL/model (and the cached model list) to be re-resolved on next use."""
+    global _config_generation
+    _config_generation += 1
+    _resolved_config.clear()
+    OllamaService._models_cache.clear()
+    OllamaService._server_info_cache.clear()
+
+
+def _resolve_once(name, resolver):
+    """Return the memoized value of ``name`` for the current generation, resolving it if needed."""
+    cached = _resolved_config.get(name)
+    if cached is not None and cached[0] == _config_generation:
+        return cached[1]
+    value = resolver()
+    _resolved_config[name] = (_config_generation, value)
+    return value
+
 
 class OllamaService:
     """Service to interact with Ollama API for report generation"""
     
+    # base_url -> time.monotonic() deadline until which the server is known reachable
+    _connection_cache = {}
+    _connection_lock = threading.Lock()
+    CONNECTION_CHECK_TTL = 60  # seconds
+    
+    # base_url -> (time.monotonic() deadline, model names) from the last /api/tags call
+    _models_cache = {}
+    MODELS_CACHE_TTL = 30  # seconds
+    
+    # base_url -> (time.monotonic() deadline, connection status, server version) shown
+    # by the status endpoint; failures are kept too, so polling a down server is cheap
+    _server_info_cache = {}
+    SERVER_INFO_CACHE_TTL = 30  # seconds
+    
+    # Seconds a generated response is reused for an identical model + full prompt
+    RESPONSE_CACHE_TIMEOUT = 86400
+    
     def __init__(self, custom_model: str = None):
         # Get Ollama configuration from environment variables
         self.base_url = self._get_ollama_url()
         self.model = custom_model or self._get_ollama_model()
         self.timeout = 300  # 5 minutes timeout for long generations
         
+        # Larger models need different settings for optimal performance; the model
+        # is fixed for the instance, so pick the options and timeout once
+        model_lower = self.model.lower()
+        self._is_large_model = any(size in model_lower for size in LARGE_MODEL_SIZES)
+        self._gen_options = LARGE_MODEL_OPTIONS if self._is_large_model else DEFAULT_MODEL_OPTIONS
+        # Use longer timeout for larger models
+        self._gen_timeout = self.timeout * 2 if self._is_large_model else self.timeout
+        self._gen_timeout_config = httpx.Timeout(self._gen_timeout, connect=CONNECT_TIMEOUT)
+        self._default_timeout = httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT)
+        if self._is_large_model:
+            logger.info(f"Using optimized settings for large model {self.model}")
+        
+        # One pooled HTTP client per service instance (keep-alive across API calls);
+        # per-call timeouts override the default
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=self._default_timeout
+        )
+        # httpx.Client has no finalizer of its own: close the pool once this instance
+        # is unreferenced (e.g. dropped by LLMProviderFactory.reload_configuration
+        # after any in-flight generation finished with it)
+        self._finalizer = weakref.finalize(self, self._client.close)
+        
         logger.info(f"OllamaService initialized with model: {self.model} (custom_model={custom_model})")
         
-        # Test connection
-        self._test_connection()
+        # The connection is tested lazily (see verify_connection), not on construction
     
     def _get_ollama_url(self) -> str:
-        """Get Ollama URL from configuration"""
+        """Get Ollama URL from configuration (resolved once per configuration generation)"""
+        return _resolve_once('OLLAMA_URL', self._resolve_ollama_url)
+    
+    def _resolve_ollama_url(self) -> str:
+        """Resolve Ollama URL from configuration"""
         url = None
         
         # 1. Try Django settings first
@@ -50,7 +191,11 @@ class OllamaService:
         return url.rstrip('/')  # Remove trailing slash
     
     def _get_ollama_model(self) -> str:
-        """Get Ollama model from configuration"""
+        """Get Ollama model from configuration (resolved once per configuration generation)"""
+        return _resolve_once('OLLAMA_MODEL', self._resolve_ollama_model)
+    
+    def _resolve_ollama_model(self) -> str:
+        """Resolve Ollama model from configuration"""
         model = None
         
         # 1. Try direct environment variable first (updated by reload_configuration or PUT request)
@@ -75,51 +220,79 @@ class OllamaService:
             model = 'llama3.1:8b'
             logger.debug(f"Using default OLLAMA_MODEL: {model}")
         
-        logger.info(f"_get_ollama_model() returning: {model}")
+        logger.info(f"_resolve_ollama_model() returning: {model}")
         return model
     
     def get_available_models(self) -> List[str]:
         """
-        Get list of available models from Ollama
+        Get list of available models from Ollama (cached for MODELS_CACHE_TTL
+        seconds per base URL, shared by all instances)
         
         Returns:
             List of available model names
         """
+        cached = OllamaService._models_cache.get(self.base_url)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.get(f"{self.base_url}/api/tags")
+            response = self._client.get("/api/tags", timeout=MODELS_TIMEOUT)
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    models = []
+            if response.status_code == 200:
+                data = response.json()
+                models = []
                     
-                    for model in data.get('models', []):
-                        model_name = model.get('name', '')
-                        if model_name:
-                            models.append(model_name)
-                    
-                    return models
-                else:
-                    logger.error(f"Failed to get models from Ollama: {response.status_code}")
-                    return []
+                for model in data.get('models', []):
+                    model_name = model.get('name', '')
+                    if model_name:
+                        models.append(model_name)
+                
+                # Failures are not cached, so a recovered server is seen immediately
+                OllamaService._models_cache[self.base_url] = (
+                    time.monotonic() + self.MODELS_CACHE_TTL, tuple(models)
+                )
+                return models
+            else:
+                logger.error(f"Failed to get models from Ollama: {response.status_code}")
+                return []
                     
         except Exception as e:
             logger.error(f"Error getting available models: {str(e)}")
             return []
 
+    def close(self):
+        """Close the pooled HTTP client of this service"""
+        self._finalizer()
+
+    def verify_connection(self):
+        """
+        Ensure the Ollama server is reachable, testing it at most once per
+        CONNECTION_CHECK_TTL seconds per base URL (shared by all instances).
+        
+        Raises:
+            ConnectionError: If the server cannot be reached
+        """
+        if OllamaService._connection_cache.get(self.base_url, 0) > time.monotonic():
+            return
+        with OllamaService._connection_lock:
+            # Another thread may have verified the server while we waited
+            if OllamaService._connection_cache.get(self.base_url, 0) > time.monotonic():
+                return
+            self._test_connection()
+            OllamaService._connection_cache[self.base_url] = time.monotonic() + self.CONNECTION_CHECK_TTL
+
     def _test_connection(self):
         """Test connection to Ollama server"""
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(f"{self.base_url}/api/version")
-                if response.status_code != 200:
-                    raise ConnectionError(f"Ollama server not responding: {response.status_code}")
+            response = self._client.get("/api/version", timeout=SHORT_TIMEOUT)
+            if response.status_code != 200:
+                raise ConnectionError(f"Ollama server not responding: {response.status_code}")
                 
-                # Log connection info
-                version_info = response.json() if response.status_code == 200 else {}
-                logger.info(f"Successfully connected to Ollama server at {self.base_url}")
-                logger.info(f"Ollama version: {version_info.get('version', 'unknown')}")
-                logger.info(f"Using model: {self.model}")
+            # Log connection info
+            version_info = response.json() if response.status_code == 200 else {}
+            logger.info(f"Successfully connected to Ollama server at {self.base_url}")
+            logger.info(f"Ollama version: {version_info.get('version', 'unknown')}")
+            logger.info(f"Using model: {self.model}")
                 
         except Exception as e:
             logger.error(f"Failed to connect to Ollama server at {self.base_url}")
@@ -153,155 +326,146 @@ class OllamaService:
             # Construct full prompt with context
             full_prompt = self._construct_full_prompt(prompt, events_context)
             
+            # Identical model + prompt: reuse the previous generation
+            cache_key = self._response_cache_key(full_prompt)
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                return self._success_result(full_prompt, cached_text, start_time, cached=True)
+            
+            # Make sure the server is reachable (cached verdict)
+            self.verify_connection()
+            
             # Generate content with Ollama
             response_text = self._call_ollama_api(full_prompt)
+            cache.set(cache_key, response_text, self.RESPONSE_CACHE_TIMEOUT)
             
-            # Calculate generation time
-            generation_time = time.time() - start_time
-            
-            return {
-                'content': response_text,
-                'tokens_used': self._estimate_tokens(full_prompt + response_text),
-                'generation_time': generation_time,
-                'success': True,
-                'provider': 'ollama',
-                'model': self.model
-            }
+            return self._success_result(full_prompt, response_text, start_time)
             
         except Exception as e:
-            logger.error(f"Error generating report with Ollama: {str(e)}")
-            return {
-                'content': f"Error generating report with Ollama: {str(e)}",
-                'tokens_used': 0,
-                'generation_time': time.time() - start_time,
-                'success': False,
-                'error': str(e),
-                'provider': 'ollama',
-                'model': self.model
-            }
+            return self._error_result(e, start_time)
     
-    def _call_ollama_api(self, prompt: str) -> str:
-        """Make API call to Ollama"""
-        # Adjust parameters based on model size
-        # Larger models need different settings for optimal performance
-        is_large_model = any(size in self.model.lower() for size in ['34b', '27b', '70b', '32b'])
+    def generate_report_stream(self, prompt: str, events: List[Event]) -> Iterator[str]:
+        """
+        Generate a report like generate_report, yielding the content as Ollama
+        produces it (e.g. for a StreamingHttpResponse). Errors are raised, not
+        returned as a result dict.
         
-        options = {
-            "temperature": 0.7,
-            "num_predict": 2048,  # Max tokens to generate
-            "top_p": 0.9,
-            "top_k": 40
+        Args:
+            prompt: User-provided prompt for report generation
+            events: List of Event objects to analyze
+        """
+        self.verify_connection()
+        full_prompt = self._construct_full_prompt(prompt, self._build_events_context(events))
+        yield from self._stream_ollama_api(full_prompt)
+    
+    def _response_cache_key(self, full_prompt: str) -> str:
+        """Cache key of the generation for this model and full prompt"""
+        digest = hashlib.blake2b(f"{self.model}\0{full_prompt}".encode(), digest_size=16).hexdigest()
+        return f"ollama:response:{digest}"
+    
+    def _success_result(self, full_prompt: str, response_text: str, start_time: float,
+                        cached: bool = False) -> Dict[str, Any]:
+        """Build the generate_report result for a successful (or cached) generation"""
+        return {
+            'content': response_text,
+            'tokens_used': self._estimate_tokens(full_prompt) + self._estimate_tokens(response_text),
+            'generation_time': time.time() - start_time,
+            'success': True,
+            'provider': 'ollama',
+            'model': self.model,
+            'cached': cached
         }
-        
-        # For larger models, reduce some parameters to improve performance
-        if is_large_model:
-            options.update({
-                "num_predict": 1500,  # Slightly reduce max tokens for faster generation
-                "top_k": 20,  # Reduce top_k for more focused responses
-                "temperature": 0.5  # Lower temperature for more consistent responses
-            })
-            logger.info(f"Using optimized settings for large model {self.model}")
-        
-        payload = {
+    
+    def _error_result(self, error: Exception, start_time: float) -> Dict[str, Any]:
+        """Build the generate_report result for a failed generation"""
+        logger.error(f"Error generating report with Ollama: {str(error)}")
+        return {
+            'content': f"Error generating report with Ollama: {str(error)}",
+            'tokens_used': 0,
+            'generation_time': time.time() - start_time,
+            'success': False,
+            'error': str(error),
+            'provider': 'ollama',
+            'model': self.model
+        }
+    
+    def _generate_payload(self, prompt: str) -> Dict[str, Any]:
+        """Build the /api/generate request body"""
+        return {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
-            "options": options
+            # Streamed: the read timeout applies between chunks rather than to the
+            # whole generation, and text can be forwarded as soon as it is decoded
+            "stream": True,
+            "options": self._gen_options
         }
+    
+    @staticmethod
+    def _check_stream_status(response):
+        """Raise for a non-200 /api/generate response (its body must already be read)"""
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+    
+    @staticmethod
+    def _parse_stream_line(line: str):
+        """
+        Parse one NDJSON line of a streamed /api/generate response
+        
+        Returns:
+            (text chunk, done flag)
+        """
+        chunk = json.loads(line)
+        if 'error' in chunk:
+            raise Exception(f"Ollama generation error: {chunk['error']}")
+        return chunk.get('response', ''), chunk.get('done', False)
+    
+    def _stream_ollama_api(self, prompt: str) -> Iterator[str]:
+        """Make a streamed API call to Ollama, yielding text chunks as they are generated"""
+        timeout = self._gen_timeout
+        logger.info(f"Using timeout: {timeout}s for model {self.model}")
         
         try:
-            # Use longer timeout for larger models
-            timeout = self.timeout * 2 if is_large_model else self.timeout
-            logger.info(f"Using timeout: {timeout}s for model {self.model}")
-            
-            with httpx.Client(timeout=timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                
+            with self._client.stream(
+                "POST",
+                "/api/generate",
+                timeout=self._gen_timeout_config,
+                json=self._generate_payload(prompt)
+            ) as response:
                 if response.status_code != 200:
-                    raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
-                
-                result = response.json()
-                
-                if 'error' in result:
-                    raise Exception(f"Ollama generation error: {result['error']}")
-                
-                return result.get('response', '')
+                    response.read()
+                    self._check_stream_status(response)
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    text, done = self._parse_stream_line(line)
+                    if text:
+                        yield text
+                    if done:
+                        break
                 
         except httpx.TimeoutException:
-            timeout_used = timeout if 'timeout' in locals() else self.timeout
-            raise Exception(f"Ollama request timed out after {timeout_used} seconds. Try using a smaller model for faster generation.")
+            raise Exception(f"Ollama request timed out after {timeout} seconds. Try using a smaller model for faster generation.")
         except Exception as e:
             raise Exception(f"Failed to call Ollama API: {str(e)}")
     
+    def _call_ollama_api(self, prompt: str) -> str:
+        """Make API call to Ollama, accumulating the streamed response"""
+        return ''.join(self._stream_ollama_api(prompt))
+    
     def _build_events_context(self, events: List[Event]) -> str:
-        """Build structured context from events data"""
-        context_parts = []
-        
-        for event in events:
-            # Base event information
-            event_data = {
-                'id': event.id,
-                'external_id': event.external_id,
-                'shared': event.shared,
-                'shared_at': event.shared_at.isoformat() if event.shared_at else None,
-                'organization': event.organization.name if event.organization else 'Unknown',
-                'arrival_time': event.arrival_time.isoformat() if event.arrival_time else None,
-            }
-            
-            # Add the JSON data from the event
-            if event.data:
-                event_data['event_details'] = event.data
-            
-            # Add timing information if available
-            timing_info = {}
-            if event.timeliness:
-                timing_info['timeliness'] = str(event.timeliness)
-            if event.extension_time:
-                timing_info['extension_time'] = str(event.extension_time)
-            if event.anon_time:
-                timing_info['anon_time'] = str(event.anon_time)
-            if event.sharing_speed:
-                timing_info['sharing_speed'] = str(event.sharing_speed)
-            
-            if timing_info:
-                event_data['timing_metrics'] = timing_info
-            
-            # Add reports count if available
-            if hasattr(event, 'reports'):
-                event_data['previous_reports_count'] = event.reports.count()
-            
-            context_parts.append(f"Event {event.id}: {json.dumps(event_data, indent=2)}")
-        
-        return "\n\n".join(context_parts)
+        """Build structured context from events data (see reports.utils.build_events_context)"""
+        return build_events_context(events)
     
     def _construct_full_prompt(self, user_prompt: str, events_context: str) -> str:
         """Construct the full prompt with context injection"""
-        system_prompt = """You are a cybersecurity analyst expert in CTI (Cyber Threat Intelligence). 
-Your task is to analyze security events and generate professional reports based on the provided data.
-
-Please provide your analysis in a clear, structured format using markdown.
-Focus on actionable insights and recommendations.
-Be concise but thorough in your analysis."""
-        
-        full_prompt = f"""{system_prompt}
-
-USER REQUEST:
-{user_prompt}
-
-EVENTS DATA TO ANALYZE:
-{events_context}
-
-Please generate a comprehensive report based on the above information."""
-        
-        return full_prompt
+        return PROMPT_TEMPLATE.format(user_prompt=user_prompt, events_context=events_context)
     
     def _estimate_tokens(self, text: str) -> int:
-        """Rough estimation of tokens used (approximation: 1 token ≈ 4 characters)"""
-        return len(text) // 4
+        """Estimate tokens used, with tiktoken when installed (otherwise 1 token ≈ 4 characters)"""
+        tokenizer = _get_tokenizer(self.model)
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, disallowed_special=()))
+        return len(text) >> 2
 
     def is_model_available(self, model_name: str) -> bool:
         """Check if a specific model is available"""
@@ -325,29 +489,52 @@ Please generate a comprehensive report based on the above information."""
             'configuration_source': self._get_config_source()
         }
         
-        # Test connection and get server info
-        try:
-            with httpx.Client(timeout=10.0) as client:
-                # Get version info
-                version_response = client.get(f"{self.base_url}/api/version")
-                if version_response.status_code == 200:
-                    config_info['connection_status'] = 'connected'
-                    version_data = version_response.json()
-                    config_info['server_version'] = version_data.get('version', 'unknown')
-                else:
-                    config_info['connection_status'] = f'error_http_{version_response.status_code}'
-                
-                # Get models count
-                models_response = client.get(f"{self.base_url}/api/tags")
-                if models_response.status_code == 200:
-                    models_data = models_response.json()
-                    config_info['available_models_count'] = len(models_data.get('models', []))
-                
-        except Exception as e:
-            config_info['connection_status'] = f'error: {str(e)}'
+        # Test connection and get server info (both cached, see _get_server_info and
+        # get_available_models). Only when both caches are cold do the two probes run
+        # concurrently, so the wait is the slower round trip rather than the sum of both
+        now = time.monotonic()
+        models_cached = OllamaService._models_cache.get(self.base_url)
+        info_cached = OllamaService._server_info_cache.get(self.base_url)
+        if (models_cached is None or models_cached[0] <= now) and (info_cached is None or info_cached[0] <= now):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                models_future = executor.submit(self.get_available_models)
+                connection_status, server_version = self._get_server_info()
+                models = models_future.result()
+        else:
+            connection_status, server_version = self._get_server_info()
+            models = self.get_available_models()
+        config_info['connection_status'] = connection_status
+        config_info['server_version'] = server_version
+        if connection_status == 'connected':
+            config_info['available_models_count'] = len(models)
             
         return config_info
     
+    def _get_server_info(self) -> Tuple[str, str]:
+        """
+        Get the connection status and version of the Ollama server, queried at most
+        once per SERVER_INFO_CACHE_TTL seconds per base URL (shared by all instances)
+        """
+        cached = OllamaService._server_info_cache.get(self.base_url)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        
+        server_version = 'unknown'
+        try:
+            version_response = self._client.get("/api/version", timeout=SHORT_TIMEOUT)
+            if version_response.status_code == 200:
+                connection_status = 'connected'
+                server_version = version_response.json().get('version', 'unknown')
+            else:
+                connection_status = f'error_http_{version_response.status_code}'
+        except Exception as e:
+            connection_status = f'error: {str(e)}'
+        
+        OllamaService._server_info_cache[self.base_url] = (
+            time.monotonic() + self.SERVER_INFO_CACHE_TTL, connection_status, server_version
+        )
+        return connection_status, server_version
+    
     def _get_config_source(self) -> str:
         """
         Determine where the Ollama URL configuration is coming from
@@ -1,11 +1,31 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Report
+from .utils import with_events_count
 from event.models import Event
 
 
+# Event data keys tried in order for each summarized field
+_TITLE_KEYS = ('title', 'info', 'summary', 'alert')
+_DESCRIPTION_KEYS = ('description', 'details', 'message')
+_SOURCE_IP_KEYS = ('source_ip', 'src_ip', 'srcip')
+_DESTINATION_IP_KEYS = ('destination_ip', 'dest_ip', 'dstip')
+# Event data keys copied as-is when present
+_OPTIONAL_KEYS = ('severity', 'status', 'category', 'type')
+
+
+def _first(data, keys, default=None):
+    """Return the first truthy value of ``keys`` in ``data``, else ``default``"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return default
+
+
 class ReportListSerializer(serializers.ModelSerializer):
     """Serializer for listing reports with minimal information"""
-    events_count = serializers.ReadOnlyField()
+    events_count = serializers.IntegerField(read_only=True)
     user_name = serializers.CharField(source='user.username', read_only=True)
     content = serializers.CharField(source='generated_content', read_only=True)
     
@@ -13,11 +33,22 @@ class ReportListSerializer(serializers.ModelSerializer):
         model = Report
         fields = ['id', 'title', 'content', 'status', 'error_message', 'events_count', 'user_name',
                  'created_at', 'updated_at', 'tokens_used', 'generation_time', 'llm_provider', 'llm_model']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load only the columns the list exposes (no prompt), the user name and the events count"""
+        return with_events_count(
+            queryset.select_related('user').only(
+                'id', 'title', 'generated_content', 'status', 'error_message',
+                'created_at', 'updated_at', 'tokens_used', 'generation_time',
+                'llm_provider', 'llm_model', 'user', 'user__username'
+            )
+        )
 
 
 class ReportDetailSerializer(serializers.ModelSerializer):
     """Serializer for detailed report view"""
-    events_count = serializers.ReadOnlyField()
+    events_count = serializers.IntegerField(read_only=True)
     user_name = serializers.CharField(source='user.username', read_only=True)
     events = serializers.SerializerMethodField()
     content = serializers.CharField(source='generated_content', read_only=True)
@@ -28,67 +59,49 @@ class ReportDetailSerializer(serializers.ModelSerializer):
                  'events', 'events_count', 'user_name', 'created_at', 'updated_at', 'tokens_used',
                  'generation_time', 'llm_provider', 'llm_model']
     
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the user and the events count alongside the reports (events come from get_events)"""
+        return with_events_count(queryset.select_related('user'))
+    
     def get_events(self, obj):
         """Return comprehensive event information"""
         events_info = []
-        for event in obj.events.all():
+        # Plain rows with the organization name joined in: no Event instances are built
+        rows = obj.events.values(
+            'id', 'external_id', 'shared', 'arrival_time', 'data', 'organization__name'
+        )
+        for row in rows:
+            event_id = row['id']
+            organization = row['organization__name']
             event_info = {
-                'id': event.id,
-                'external_id': event.external_id,
-                'shared': event.shared,
-                'organization': event.organization.name if event.organization else 'Unknown',
-                'arrival_time': event.arrival_time,
-                'created_at': event.arrival_time  # alias for frontend compatibility
+                'id': event_id,
+                'external_id': row['external_id'],
+                'shared': row['shared'],
+                'organization': organization if organization is not None else 'Unknown',
+                'arrival_time': row['arrival_time'],
+                'created_at': row['arrival_time']  # alias for frontend compatibility
             }
             
             # Try to extract comprehensive information from event data JSON
-            if event.data and isinstance(event.data, dict):
-                # Extract title/info
-                event_info['title'] = (
-                    event.data.get('title') or 
-                    event.data.get('info') or 
-                    event.data.get('summary') or 
-                    event.data.get('alert') or
-                    f"Event {event.id}"
-                )
-                
-                # Extract description
-                event_info['description'] = (
-                    event.data.get('description') or
-                    event.data.get('details') or
-                    event.data.get('message') or
-                    'No description available'
-                )
+            data = row['data']
+            if data and isinstance(data, dict):
+                event_info['title'] = _first(data, _TITLE_KEYS, f"Event {event_id}")
+                event_info['description'] = _first(data, _DESCRIPTION_KEYS, 'No description available')
                 
                 # Extract network information
-                event_info['source_ip'] = (
-                    event.data.get('source_ip') or
-                    event.data.get('src_ip') or
-                    event.data.get('srcip') or
-                    None
-                )
-                
-                event_info['destination_ip'] = (
-                    event.data.get('destination_ip') or
-                    event.data.get('dest_ip') or
-                    event.data.get('dstip') or
-                    None
-                )
+                event_info['source_ip'] = _first(data, _SOURCE_IP_KEYS)
+                event_info['destination_ip'] = _first(data, _DESTINATION_IP_KEYS)
                 
                 # Add other relevant fields
-                if 'severity' in event.data:
-                    event_info['severity'] = event.data['severity']
-                if 'status' in event.data:
-                    event_info['status'] = event.data['status']
-                if 'category' in event.data:
-                    event_info['category'] = event.data['category']
-                if 'type' in event.data:
-                    event_info['type'] = event.data['type']
+                for key in _OPTIONAL_KEYS:
+                    if key in data:
+                        event_info[key] = data[key]
                     
                 # Include the full data for complete information
-                event_info['data'] = event.data
+                event_info['data'] = data
             else:
-                event_info['title'] = f"Event {event.id}"
+                event_info['title'] = f"Event {event_id}"
                 event_info['description'] = 'No description available'
             
             events_info.append(event_info)
@@ -98,9 +111,11 @@ class ReportDetailSerializer(serializers.ModelSerializer):
 
 class ReportCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new reports"""
+    # Only the primary keys are needed to link the events (the access check is a COUNT
+    # in the view), so do not load each event's JSON payload while validating
     events = serializers.PrimaryKeyRelatedField(
         many=True, 
-        queryset=Event.objects.all(),
+        queryset=Event.objects.only('id'),
         required=True
     )
     
@@ -109,9 +124,12 @@ class ReportCreateSerializer(serializers.ModelSerializer):
         fields = ['title', 'prompt', 'events']
     
     def validate_events(self, value):
-        """Ensure at least one event is selected"""
+        """Ensure at least one and at most REPORT_MAX_EVENTS events are selected"""
         if not value:
             raise serializers.ValidationError("At least one event must be selected.")
+        max_events = settings.REPORT_MAX_EVENTS
+        if len(value) > max_events:
+            raise serializers.ValidationError(f"At most {max_events} events can be selected.")
         return value
     
     def create(self, validated_data):
@@ -1,16 +1,60 @@
 import google.generativeai as genai
-import json
+import hashlib
 import time
 import os
+import threading
 from django.conf import settings
-from decouple import config
+from django.core.cache import cache
+from cti4bc_backend.env import config
 from event.models import Event
-from typing import List, Dict, Any
+from .utils import build_events_context
+from typing import List, Dict, Any, Iterator
+
+
+SYSTEM_PROMPT = """You are a cybersecurity analyst expert in CTI (Cyber Threat Intelligence). 
+Your task is to analyze security events and generate professional reports based on the provided data.
+
+Please provide your analysis in a clear, structured format using markdown.
+Focus on actionable insights and recommendations."""
+
+# Built once at import; only the events context and user request vary per call.
+# SYSTEM_PROMPT is not part of it: it is set once as the model's system_instruction.
+# The events come before the user request so that regenerating a report over the
+# same events keeps the longest possible identical prompt prefix (provider-side
+# prompt caches reuse it).
+PROMPT_TEMPLATE = """EVENTS DATA TO ANALYZE:
+{events_context}
+
+USER REQUEST:
+{user_prompt}
+
+Please generate a comprehensive report based on the above information."""
+
+# Bound output length and the time a generation may hold a worker
+GENERATION_CONFIG = {'max_output_tokens': 4096}
+REQUEST_OPTIONS = {'timeout': 300}
+
+# API key genai is currently configured with: genai.configure sets up the process-wide
+# client (and its connection), so it is only called again when the key changes
+_configured_api_key = None
+_configure_lock = threading.Lock()
+
+
+def _configure_genai(api_key):
+    """Configure the Gemini SDK for ``api_key`` once per process"""
+    global _configured_api_key
+    with _configure_lock:
+        if _configured_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
 
 
 class GeminiService:
     """Service to interact with Google Gemini API for report generation"""
     
+    # Seconds a generated response is reused for an identical model + prompt
+    RESPONSE_CACHE_TIMEOUT = 3600
+    
     def __init__(self):
         # Configure Gemini API with key from environment variables
         # Get API key from .env file only (secure approach)
@@ -37,10 +81,16 @@ class GeminiService:
                 "Example: GEMINI_API_KEY=your_api_key_here"
             )
         
-        genai.configure(api_key=api_key)
+        _configure_genai(api_key)
         # Model name is configurable via the GEMINI_MODEL env var
         self.model_name = getattr(settings, 'GEMINI_MODEL', None) or 'gemini-1.5-flash'
-        self.model = genai.GenerativeModel(self.model_name)
+        # The static system prompt is sent as system instruction, separate from the
+        # per-report content, so it is never rebuilt into each request's prompt
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            system_instruction=SYSTEM_PROMPT,
+            generation_config=GENERATION_CONFIG
+        )
     
     def generate_report(self, prompt: str, events: List[Event]) -> Dict[str, Any]:
         """
@@ -62,92 +112,92 @@ class GeminiService:
             # Construct full prompt with context
             full_prompt = self._construct_full_prompt(prompt, events_context)
             
-            # Generate content with Gemini
-            response = self.model.generate_content(full_prompt)
+            # Identical model + prompt: reuse the previous generation
+            cache_key = self._response_cache_key(full_prompt)
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                return self._cached_result(full_prompt, cached_text, start_time)
             
-            # Calculate generation time
-            generation_time = time.time() - start_time
+            # Generate content with Gemini (streamed, accumulated server-side)
+            response = self.model.generate_content(full_prompt, stream=True, request_options=REQUEST_OPTIONS)
+            response_text = ''.join(self._iter_text(response))
+            cache.set(cache_key, response_text, self.RESPONSE_CACHE_TIMEOUT)
             
-            return {
-                'content': response.text,
-                'tokens_used': self._estimate_tokens(full_prompt + response.text),
-                'generation_time': generation_time,
-                'success': True,
-                'provider': 'gemini',
-                'model': self.model_name
-            }
+            return self._success_result(
+                response_text, self._tokens_used(response, full_prompt, response_text), start_time
+            )
             
         except Exception as e:
-            return {
-                'content': f"Error generating report: {str(e)}",
-                'tokens_used': 0,
-                'generation_time': time.time() - start_time,
-                'success': False,
-                'error': str(e),
-                'provider': 'gemini',
-                'model': self.model_name
-            }
+            return self._error_result(e, start_time)
     
-    def _build_events_context(self, events: List[Event]) -> str:
-        """Build structured context from events data"""
-        context_parts = []
-        
-        for event in events:
-            # Base event information
-            event_data = {
-                'id': event.id,
-                'external_id': event.external_id,
-                'shared': event.shared,
-                'shared_at': event.shared_at.isoformat() if event.shared_at else None,
-                'organization': event.organization.name if event.organization else 'Unknown',
-                'arrival_time': event.arrival_time.isoformat() if event.arrival_time else None,
-            }
-            
-            # Add the JSON data from the event
-            if event.data:
-                event_data['event_details'] = event.data
-            
-            # Add timing information if available
-            timing_info = {}
-            if event.timeliness:
-                timing_info['timeliness'] = str(event.timeliness)
-            if event.extension_time:
-                timing_info['extension_time'] = str(event.extension_time)
-            if event.anon_time:
-                timing_info['anon_time'] = str(event.anon_time)
-            if event.sharing_speed:
-                timing_info['sharing_speed'] = str(event.sharing_speed)
-            
-            if timing_info:
-                event_data['timing_metrics'] = timing_info
-            
-            # Add reports count if available
-            if hasattr(event, 'reports'):
-                event_data['previous_reports_count'] = event.reports.count()
-            
-            context_parts.append(f"Event {event.id}: {json.dumps(event_data, indent=2)}")
+    def _success_result(self, response_text: str, tokens_used: int, start_time: float,
+                        cached: bool = False) -> Dict[str, Any]:
+        """Build the generate_report result for a successful (or cached) generation"""
+        return {
+            'content': response_text,
+            'tokens_used': tokens_used,
+            'generation_time': time.time() - start_time,
+            'success': True,
+            'provider': 'gemini',
+            'model': self.model_name,
+            'cached': cached
+        }
+    
+    def _cached_result(self, full_prompt: str, cached_text: str, start_time: float) -> Dict[str, Any]:
+        """Build the generate_report result for a response served from the cache"""
+        tokens_used = self._estimate_tokens(full_prompt) + self._estimate_tokens(cached_text)
+        return self._success_result(cached_text, tokens_used, start_time, cached=True)
+    
+    def _error_result(self, error: Exception, start_time: float) -> Dict[str, Any]:
+        """Build the generate_report result for a failed generation"""
+        return {
+            'content': f"Error generating report: {str(error)}",
+            'tokens_used': 0,
+            'generation_time': time.time() - start_time,
+            'success': False,
+            'error': str(error),
+            'provider': 'gemini',
+            'model': self.model_name
+        }
+    
+    def generate_report_stream(self, prompt: str, events: List[Event]) -> Iterator[str]:
+        """
+        Generate a report like generate_report, yielding the content as Gemini
+        produces it (e.g. for a StreamingHttpResponse). Errors are raised, not
+        returned as a result dict.
         
-        return "\n\n".join(context_parts)
+        Args:
+            prompt: User-provided prompt for report generation
+            events: List of Event objects to analyze
+        """
+        full_prompt = self._construct_full_prompt(prompt, self._build_events_context(events))
+        yield from self._iter_text(self.model.generate_content(full_prompt, stream=True, request_options=REQUEST_OPTIONS))
+    
+    def _response_cache_key(self, full_prompt: str) -> str:
+        """Cache key of the generation for this model and prompt (the system prompt is fixed)"""
+        digest = hashlib.blake2b(f"{self.model_name}\0{full_prompt}".encode(), digest_size=16).hexdigest()
+        return f"gemini:response:{digest}"
+    
+    @staticmethod
+    def _iter_text(response) -> Iterator[str]:
+        """Yield the text chunks of a streamed Gemini response"""
+        for chunk in response:
+            yield chunk.text
+    
+    def _tokens_used(self, response, full_prompt: str, response_text: str) -> int:
+        """Exact token usage reported by Gemini, or an estimate when it is missing"""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage and usage.total_token_count:
+            return usage.prompt_token_count + usage.candidates_token_count
+        return self._estimate_tokens(full_prompt) + self._estimate_tokens(response_text)
+    
+    def _build_events_context(self, events: List[Event]) -> str:
+        """Build structured context from events data (see reports.utils.build_events_context)"""
+        return build_events_context(events)
     
     def _construct_full_prompt(self, user_prompt: str, events_context: str) -> str:
-        """Construct the full prompt with context injection"""
-        system_prompt = """You are a cybersecurity analyst expert in CTI (Cyber Threat Intelligence). 
-Your task is to analyze security events and generate professional reports based on the provided data.
-
-Please provide your analysis in a clear, structured format using markdown.
-Focus on actionable insights and recommendations."""
-        
-        full_prompt = f"""{system_prompt}
-
-USER REQUEST:
-{user_prompt}
-
-EVENTS DATA TO ANALYZE:
-{events_context}
-
-Please generate a comprehensive report based on the above information."""
-        
-        return full_prompt
+        """Construct the request content with context injection (the system prompt is the model's system instruction)"""
+        return PROMPT_TEMPLATE.format(user_prompt=user_prompt, events_context=events_context)
     
     def _estimate_tokens(self, text: str) -> int:
         """Rough estimation of tokens used (approximation: 1 token ≈ 4 characters)"""
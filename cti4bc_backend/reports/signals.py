@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .llm_factory import LLMProviderFactory
+from .models import LLMConfig
+
+
+@receiver(post_save, sender=LLMConfig)
+@receiver(post_delete, sender=LLMConfig)
+def reload_llm_configuration(sender, instance, **kwargs):
+    """
+    Drop the resolved LLM configuration and cached services when LLMConfig
+    changes (views and the admin alike)
+    """
+    LLMProviderFactory.reload_configuration()
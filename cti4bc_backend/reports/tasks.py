@@ -8,6 +8,7 @@ import logging
 
 from .models import Report
 from .llm_factory import LLMProviderFactory
+from .utils import events_for_generation
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +32,8 @@ def generate_report_task(report_id):
     report.save(update_fields=['status', 'updated_at'])
 
     try:
-        events = list(report.events.all())
+        # Fetch organizations and report counts with the events (one query instead of 2N+1)
+        events = events_for_generation(report)
         llm_service = LLMProviderFactory.get_configured_llm_service()
         result = llm_service.generate_report(prompt=report.prompt, events=events)
 
@@ -3,6 +3,7 @@ from .views import (
     ReportListCreateView,
     ReportDetailView,
     RegenerateReportView,
+    ReportStreamView,
     LLMManagementView,
     LLMModelsView,
     get_llm_status
@@ -13,6 +14,7 @@ urlpatterns = [
     path('', ReportListCreateView.as_view(), name='report_list_create'),
     path('<int:pk>/', ReportDetailView.as_view(), name='report_detail'),
     path('<int:pk>/regenerate/', RegenerateReportView.as_view(), name='report_regenerate'),
+    path('<int:pk>/stream/', ReportStreamView.as_view(), name='report_stream'),
     
     # LLM management endpoints
     path('llm/', LLMManagementView.as_view(), name='llm_management'),
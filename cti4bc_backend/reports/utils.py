@@ -0,0 +1,142 @@
+"""
+Query and serialization helpers for reports and the events they analyze
+"""
+import io
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Report
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+
+def with_events_count(queryset):
+    """
+    Annotate reports with `_events_count` (read by Report.events_count), computed by
+    the database in the same query. A correlated subquery is used so the count stays
+    correct when the outer query filters or joins on events.
+    """
+    counts = (
+        Report.events.through.objects
+        .filter(report_id=OuterRef('pk'))
+        .values('report_id')
+        .annotate(count=Count('event_id'))
+        .values('count')
+    )
+    return queryset.annotate(
+        _events_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+def events_for_generation(report):
+    """
+    The events of ``report`` as the LLM services consume them: with their organization
+    and report count loaded in the same query, and in a stable order so the same event
+    set always yields the same prompt. The count is a correlated subquery: a plain
+    Count('reports') would reuse the join of the related manager and always give 1.
+    """
+    counts = (
+        Report.events.through.objects
+        .filter(event_id=OuterRef('pk'))
+        .values('event_id')
+        .annotate(count=Count('report_id'))
+        .values('count')
+    )
+    return (
+        report.events.select_related('organization')
+        .annotate(reports_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+        .order_by('id')
+    )
+
+
+def reports_count_by_event(events):
+    """
+    Return {event id: number of reports including it} for ``events``, using the
+    `reports_count` annotation when every event carries it (see tasks.py) and a
+    single grouped query otherwise.
+    """
+    counts = {}
+    missing = []
+    for event in events:
+        annotated = getattr(event, 'reports_count', None)
+        if annotated is None:
+            missing.append(event.id)
+        else:
+            counts[event.id] = annotated
+    if missing:
+        rows = (
+            Report.events.through.objects
+            .filter(event_id__in=missing)
+            .values('event_id')
+            .annotate(count=Count('report_id'))
+            .values_list('event_id', 'count')
+        )
+        counts.update({event_id: 0 for event_id in missing})
+        counts.update(rows)
+    return counts
+
+
+def compact_json(obj) -> str:
+    """
+    Serialize ``obj`` (datetimes included) to compact JSON with sorted keys, so the
+    same data always gives the same prompt text. Uses orjson when installed.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder accepts
+            pass
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True, cls=DjangoJSONEncoder)
+
+
+def build_events_context(events) -> str:
+    """
+    Build the structured LLM context for ``events``: one compact JSON object per
+    event, written into a single buffer (no intermediate list of fragments).
+    """
+    buffer = io.StringIO()
+    reports_counts = reports_count_by_event(events)
+    
+    for index, event in enumerate(events):
+        # Base event information
+        event_data = {
+            'id': event.id,
+            'external_id': event.external_id,
+            'shared': event.shared,
+            'shared_at': event.shared_at,
+            'organization': event.organization.name if event.organization else 'Unknown',
+            'arrival_time': event.arrival_time,
+        }
+        
+        # Add the JSON data from the event
+        if event.data:
+            event_data['event_details'] = event.data
+        
+        # Add timing information if available
+        timing_info = {}
+        if event.timeliness:
+            timing_info['timeliness'] = str(event.timeliness)
+        if event.extension_time:
+            timing_info['extension_time'] = str(event.extension_time)
+        if event.anon_time:
+            timing_info['anon_time'] = str(event.anon_time)
+        if event.sharing_speed:
+            timing_info['sharing_speed'] = str(event.sharing_speed)
+        
+        if timing_info:
+            event_data['timing_metrics'] = timing_info
+        
+        # Add reports count (precomputed for all events at once)
+        event_data['previous_reports_count'] = reports_counts[event.id]
+        
+        if index:
+            buffer.write("\n\n")
+        buffer.write(f"Event {event.id}: ")
+        buffer.write(compact_json(event_data))
+    
+    return buffer.getvalue()
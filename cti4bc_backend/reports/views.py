@@ -1,11 +1,18 @@
+import hashlib
+import json
 import logging
+import time
 from django.conf import settings
 from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.db.models import Exists, OuterRef, Q
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_q.tasks import async_task
@@ -13,6 +20,7 @@ from django_q.tasks import async_task
 from .models import Report, LLMConfig
 from .serializers import ReportListSerializer, ReportDetailSerializer, ReportCreateSerializer
 from .llm_factory import LLMProviderFactory
+from .utils import compact_json, events_for_generation
 from event.models import Event
 
 logger = logging.getLogger(__name__)
@@ -26,30 +34,76 @@ def get_accessible_events(user, event_ids):
     return Event.objects.filter(id__in=event_ids, organization__in=user_organizations)
 
 
+def get_accessible_reports(user):
+    """
+    Return the reports the user is allowed to see: all of them for staff, otherwise
+    their own plus those analyzing an event of one of their organizations. The
+    organization match is an EXISTS subquery, so no join fans rows out and no
+    DISTINCT is needed.
+    """
+    if user.is_staff:
+        return Report.objects.all()
+    user_organizations = user.organizations.all()
+    organization_event = Event.objects.filter(reports=OuterRef('pk'), organization__in=user_organizations)
+    return Report.objects.filter(Q(user=user) | Exists(organization_event))
+
+
+def has_access_to_report_events(user, report):
+    """
+    Whether the user can still access every event of ``report``: a single EXISTS for
+    any event outside their organizations (staff see every event).
+    """
+    if user.is_staff:
+        return True
+    user_organizations = user.organizations.all()
+    return not report.events.exclude(organization__in=user_organizations).exists()
+
+
+class ReportCursorPagination(CursorPagination):
+    """
+    Keyset pagination of the report list over (created_at, id), newest first:
+    pages are index range scans instead of OFFSET scans
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    @classmethod
+    def requested(cls, request):
+        """Whether the client opted into pagination"""
+        return cls.cursor_query_param in request.query_params or cls.page_size_query_param in request.query_params
+
+
 class ReportListCreateView(APIView):
     """
     API View to list all reports for user's organization or create a new report
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = ReportCursorPagination
 
     def get(self, request):
         """
         Get all reports for the user's organizations
         """
         try:
-            if request.user.is_staff:
-                # Staff users can see all reports
-                reports = Report.objects.all()
-            else:
-                # Regular users can only see reports from their organizations or their own reports
-                user_organizations = request.user.organizations.all()
-                if user_organizations.exists():
-                    reports = Report.objects.filter(
-                        Q(user=request.user) |
-                        Q(events__organization__in=user_organizations)
-                    ).distinct()
-                else:
-                    reports = Report.objects.filter(user=request.user)
+            # Staff users see all reports, regular users their own and their organizations' ones
+            reports = get_accessible_reports(request.user)
+
+            # One narrow query (user and events count included) instead of per-report lookups
+            reports = ReportListSerializer.setup_eager_loading(reports)
+
+            # Keyset pagination when the client asks for it (?page_size= / ?cursor=);
+            # without those parameters the full list is returned as before
+            if self.pagination_class.requested(request):
+                paginator = self.pagination_class()
+                page = paginator.paginate_queryset(reports, request, view=self)
+                serializer = ReportListSerializer(page, many=True)
+                return Response({
+                    'reports': serializer.data,
+                    'next': paginator.get_next_link(),
+                    'previous': paginator.get_previous_link(),
+                }, status=status.HTTP_200_OK)
 
             serializer = ReportListSerializer(reports, many=True)
             return Response({'reports': serializer.data}, status=status.HTTP_200_OK)
@@ -114,18 +168,9 @@ class ReportDetailView(APIView):
         """
         Get report instance with permission checking
         """
-        if user.is_staff:
-            return get_object_or_404(Report, pk=pk)
-        else:
-            # Users can see their own reports or reports from their organizations
-            user_organizations = user.organizations.all()
-            return get_object_or_404(
-                Report,
-                Q(pk=pk) & (
-                    Q(user=user) |
-                    Q(events__organization__in=user_organizations)
-                )
-            )
+        # User and events count come with the report; events are one extra values() query
+        reports = ReportDetailSerializer.setup_eager_loading(get_accessible_reports(user))
+        return get_object_or_404(reports, pk=pk)
 
     def get(self, request, pk):
         """
@@ -133,8 +178,24 @@ class ReportDetailView(APIView):
         """
         try:
             report = self.get_object(pk, request.user)
-            serializer = ReportDetailSerializer(report)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+
+            data = ReportDetailSerializer(report).data
+
+            # Conditional GET: events carry no modification time (sharing and IP-reputation
+            # enrichment update them in place), so the ETag covers the events as served and
+            # a client holding the current version gets a 304 without the payload
+            version = f"{report.pk}-{report.updated_at.timestamp():.6f}-{report.events_count}"
+            events_digest = hashlib.blake2b(compact_json(data['events']).encode(), digest_size=16).hexdigest()
+            etag = quote_etag(f"{version}-{events_digest}")
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+
+            response = Response(data, status=status.HTTP_200_OK)
+            response['ETag'] = etag
+            # Browsers may keep it but must revalidate; shared caches must not store it
+            response['Cache-Control'] = 'private, no-cache'
+            return response
         except Exception as e:
             return Response({
                 'error': 'Report not found or access denied',
@@ -177,11 +238,12 @@ class RegenerateReportView(APIView):
         Regenerate a report with a new prompt
         """
         try:
-            # Get the report
+            # Get the report, with what the response serializer needs loaded up front
+            reports = ReportDetailSerializer.setup_eager_loading(Report.objects.all())
             if request.user.is_staff:
-                report = get_object_or_404(Report, pk=pk)
+                report = get_object_or_404(reports, pk=pk)
             else:
-                report = get_object_or_404(Report, pk=pk, user=request.user)
+                report = get_object_or_404(reports, pk=pk, user=request.user)
 
             # Get new prompt from request
             new_prompt = request.data.get('prompt')
@@ -192,14 +254,11 @@ class RegenerateReportView(APIView):
                 )
 
             # Re-check the user still has access to every event in this report
-            event_ids = list(report.events.values_list('id', flat=True))
-            if event_ids:
-                accessible_events = get_accessible_events(request.user, event_ids)
-                if accessible_events.count() != len(set(event_ids)):
-                    return Response(
-                        {'error': 'You no longer have access to all events in this report'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
+            if not has_access_to_report_events(request.user, report):
+                return Response(
+                    {'error': 'You no longer have access to all events in this report'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
 
             # Reset to pending and queue regeneration (the task updates provider/model too)
             report.prompt = new_prompt
@@ -220,6 +279,95 @@ class RegenerateReportView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class ReportStreamView(APIView):
+    """
+    API View to (re)generate a report and stream the content as it is produced,
+    as Server-Sent Events
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """
+        Generate the report (optionally with a new prompt) and stream it back.
+
+        Unlike RegenerateReportView the generation runs in this request, so the client
+        sees the first tokens as soon as the LLM emits them; the connection stays open
+        for the whole generation. Each chunk is sent as ``data: {"chunk": ...}``, then a
+        final ``event: done`` (or ``event: error``) once the report has been saved.
+        """
+        if request.user.is_staff:
+            report = get_object_or_404(Report, pk=pk)
+        else:
+            report = get_object_or_404(Report, pk=pk, user=request.user)
+
+        if not has_access_to_report_events(request.user, report):
+            return Response(
+                {'error': 'You no longer have access to all events in this report'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        new_prompt = request.data.get('prompt')
+        if new_prompt:
+            report.prompt = new_prompt
+        report.generated_content = ""
+        report.error_message = None
+        report.status = Report.STATUS_GENERATING
+        report.save()
+
+        response = StreamingHttpResponse(
+            self._stream_report(report), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # let nginx forward chunks immediately
+        return response
+
+    @staticmethod
+    def _sse(data, event=None):
+        """Format one Server-Sent Event"""
+        message = f"data: {json.dumps(data)}\n\n"
+        return f"event: {event}\n{message}" if event else message
+
+    def _stream_report(self, report):
+        """Yield the generated content as SSE messages, then persist the outcome"""
+        start_time = time.time()
+        # Read fresh: the provider recorded on the report is the one the data is sent to
+        provider, model = LLMProviderFactory.get_current_configuration(fresh=True)
+        chunks = []
+        try:
+            llm_service = LLMProviderFactory.get_configured_llm_service((provider, model))
+            for chunk in llm_service.generate_report_stream(
+                prompt=report.prompt, events=events_for_generation(report)
+            ):
+                chunks.append(chunk)
+                yield self._sse({'chunk': chunk})
+        except GeneratorExit:
+            # The client went away mid-stream: do not leave the report 'generating'
+            self._save_failure(report, "Streaming was interrupted before the report was complete")
+            raise
+        except Exception as exc:  # noqa: BLE001 - the failure is recorded on the report
+            logger.exception("Failed to stream report %s", report.pk)
+            self._save_failure(report, str(exc))
+            yield self._sse({'error': report.error_message}, event='error')
+            return
+
+        report.generated_content = "".join(chunks)
+        report.generation_time = time.time() - start_time
+        report.tokens_used = None  # streamed responses do not report usage
+        report.llm_provider = provider
+        report.llm_model = model
+        report.status = Report.STATUS_COMPLETED
+        report.save()
+        yield self._sse({'id': report.pk, 'status': report.status}, event='done')
+
+    @staticmethod
+    def _save_failure(report, error_message):
+        """Record a failed generation on the report"""
+        report.generated_content = ""
+        report.error_message = error_message
+        report.status = Report.STATUS_FAILED
+        report.save(update_fields=['generated_content', 'error_message', 'status', 'updated_at'])
+
+
 class LLMManagementView(APIView):
     """
     API View to manage LLM providers and test connections.
@@ -235,12 +383,16 @@ class LLMManagementView(APIView):
         Get information about available LLM providers and current configuration
         """
         try:
-            current_provider = LLMProviderFactory.get_current_provider()
-            current_model = LLMProviderFactory.get_current_model()
+            current_provider, current_model = LLMProviderFactory.get_current_configuration()
             available_providers = LLMProviderFactory.get_available_providers()
 
-            # Test current provider
-            current_provider_test = LLMProviderFactory.test_provider(current_provider)
+            # Test the current provider, or every provider at once with ?test_all=true
+            test_all = request.query_params.get('test_all', '').lower() in ['true', '1', 'yes']
+            if test_all:
+                providers_status = LLMProviderFactory.test_providers(available_providers)
+                current_provider_test = providers_status.get(current_provider)
+            else:
+                current_provider_test = LLMProviderFactory.test_provider(current_provider)
 
             response_data = {
                 'current_provider': current_provider,
@@ -249,6 +401,8 @@ class LLMManagementView(APIView):
                 'current_provider_status': current_provider_test,
                 'message': f"Currently using {current_provider} with model {current_model}"
             }
+            if test_all:
+                response_data['providers_status'] = providers_status
 
             return Response(response_data, status=status.HTTP_200_OK)
 
@@ -319,11 +473,9 @@ class LLMManagementView(APIView):
             cfg.provider = provider
             if provider == 'ollama' and model:
                 cfg.ollama_model = model
+            # Saving reloads the factory configuration (see reports/signals.py)
             cfg.save()
 
-            # Drop the per-process service cache so the new config is picked up at once
-            LLMProviderFactory.reload_configuration()
-
             # Test the new configuration (best-effort)
             try:
                 test_result = LLMProviderFactory.test_provider(provider)
@@ -384,9 +536,7 @@ class LLMManagementView(APIView):
             # is genuinely unknown. If Ollama is briefly down, allow the change instead
             # of blocking the admin (the failure would otherwise surface at generation).
             try:
-                from .ollama_service import OllamaService
-                temp_service = OllamaService()
-                available_models = temp_service.get_available_models()
+                available_models = LLMProviderFactory.get_ollama_service().get_available_models()
                 if available_models and model not in available_models:
                     return Response(
                         {'error': f'Model "{model}" not available. Available models: {available_models}'},
@@ -399,7 +549,6 @@ class LLMManagementView(APIView):
             cfg = LLMConfig.load()
             cfg.ollama_model = model
             cfg.save()
-            LLMProviderFactory.reload_configuration()
 
             try:
                 test_result = LLMProviderFactory.test_provider(current_provider)
@@ -440,9 +589,8 @@ class LLMModelsView(APIView):
                 provider = LLMProviderFactory.get_current_provider()
 
             if provider == 'ollama':
-                from .ollama_service import OllamaService
                 try:
-                    service = OllamaService()
+                    service = LLMProviderFactory.get_ollama_service()
                     models = service.get_available_models()
                     # Use the configured model instead of the service's default model
                     current_model = LLMProviderFactory.get_current_model()
@@ -495,9 +643,8 @@ def get_llm_status(request):
         current_provider = LLMProviderFactory.get_current_provider()
 
         if current_provider == 'ollama':
-            from .ollama_service import OllamaService
             try:
-                service = OllamaService()
+                service = LLMProviderFactory.get_ollama_service()
                 config_info = service.get_configuration_info()
 
                 # Test connection
@@ -20,7 +20,9 @@ class AddStrategySerializer(serializers.ModelSerializer):
         fields = ['name', 'description', 'template']
     
     def validate_template(self, value):
-        # Clean the template by removing keys with empty values
+        # Clean the template by removing keys with empty values (no copy when there are none)
+        if "" not in value.values():
+            return value
         cleaned_template = {k: v for k, v in value.items() if v != ""}
         return cleaned_template
     
@@ -2,19 +2,31 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from .models import Strategy
 from .serializers import StrategyListSerializer, StrategyDetailSerializer, AddStrategySerializer
 
+def get_accessible_strategies(user):
+    """
+    Return the strategies the user can see: all of them for staff, otherwise those
+    shared with one of their organizations. The match is an EXISTS subquery, so the
+    M2M join cannot duplicate rows and no DISTINCT is needed.
+    """
+    if user.is_staff:
+        return Strategy.objects.all()
+    shared_with_user = Strategy.organizations.through.objects.filter(
+        strategy_id=OuterRef('pk'), organization__users=user
+    )
+    return Strategy.objects.filter(Exists(shared_with_user))
+
 class StrategyListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        if request.user.is_staff:
-            strategies = Strategy.objects.all()
-        else:
-            user_orgs = request.user.organizations.all()
-            strategies = Strategy.objects.filter(organizations__in=user_orgs).distinct()
+        # Only the listed columns: description and template can be large
+        strategies = get_accessible_strategies(request.user).only(*StrategyListSerializer.Meta.fields)
         serializer = StrategyListSerializer(strategies, many=True)
         data = {
             'strategies': serializer.data
@@ -25,11 +37,7 @@ class StrategyDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id):
-        if request.user.is_staff:
-            strategy = get_object_or_404(Strategy, id=id)
-        else:
-            user_orgs = request.user.organizations.all()
-            strategy = get_object_or_404(Strategy, id=id, organizations__in=user_orgs)
+        strategy = get_object_or_404(get_accessible_strategies(request.user), id=id)
         serializer = StrategyDetailSerializer(strategy)
         data = {
             'strategy': serializer.data
@@ -42,13 +50,17 @@ class AddStrategyView(APIView):
     def post(self, request):
         serializer = AddStrategySerializer(data=request.data)
         if serializer.is_valid():
-            strategy = serializer.save()
-
-            # Get orgs of the user
-            user_orgs = request.user.organizations.all()
+            with transaction.atomic():
+                strategy = serializer.save()
 
-            if user_orgs.exists(): # Add the strategy to the user's organizations   
-                strategy.organizations.set(user_orgs)
+                # Add the strategy to the user's organizations: the strategy is new, so
+                # the links are inserted directly (no exists() check, no diff of .set())
+                user_org_ids = list(request.user.organizations.values_list('id', flat=True))
+                StrategyOrganization = Strategy.organizations.through
+                StrategyOrganization.objects.bulk_create([
+                    StrategyOrganization(strategy_id=strategy.id, organization_id=org_id)
+                    for org_id in user_org_ids
+                ])
                 
             return Response({'message': 'Strategy added successfully'}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
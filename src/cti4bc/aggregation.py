@@ -53,14 +53,18 @@ def aggregate(events):
     # structure the frontend expects.
     aggregated = {src: [] for src in SOURCES}
     seen = set()
+    seen_add = seen.add
     for event in events:
         for source, attribute in _iter_source_attrs(event.get("Attribute", {})):
             if not isinstance(attribute, dict):
                 continue
-            key = (source, attribute.get("category"), attribute.get("type"), attribute.get("value"))
-            if key in seen:
+            get = attribute.get
+            key = (source, get("category"), get("type"), get("value"))
+            # Add, then compare sizes: one hash of the key instead of two (`in` + add).
+            size = len(seen)
+            seen_add(key)
+            if len(seen) == size:
                 continue
-            seen.add(key)
             aggregated.setdefault(source, []).append(attribute)
 
     # Create new event
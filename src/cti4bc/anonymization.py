@@ -1,6 +1,7 @@
 from datetime import datetime
 import ipaddress
 import logging
+import socket
 from cryptography.fernet import Fernet
 import base64
 from dateutil import parser
@@ -21,6 +22,16 @@ def _configure(crypto_key_path=None):
     except(FileNotFoundError, RuntimeError) as e:
         logging.error(f"Failed to configure anonymization module: {e}")
 
+def _parse_date(value):
+    """
+    Parse a date string: ISO 8601 dates (the common case) with the C-implemented
+    datetime.fromisoformat, anything else with dateutil's fuzzy parser.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return parser.parse(value)
+
 def generelize_date(event):
     original_date = event.get("date", {}).get("value")
     format_output = event.get("date", {}).get("action")
@@ -29,7 +40,7 @@ def generelize_date(event):
         return event
     
     try:
-        dt = parser.parse(original_date)
+        dt = _parse_date(original_date)
         formated_value = dt.strftime(format_output)
         event["date"] = complete_date(formated_value) # Update the complete date field 
     except Exception as e:
@@ -48,15 +59,37 @@ def generelize_date(event):
     return event
 
 def complete_date(generalized_date):
-    date_parts = generalized_date.split('-')
-    if len(date_parts) == 1:
+    separators = generalized_date.count('-')  # no list allocation, unlike split()
+    if separators == 0:
         return f"{generalized_date}-01-01" # Append default month and day
-    elif len(date_parts) == 2:
+    elif separators == 1:
         return f"{generalized_date}-01"  # Append default day
     else:
         return generalized_date
 
+# Integer netmask of each IPv4 prefix length
+_IPV4_NETMASKS = [(0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF for prefix in range(33)]
+
+def _mask_ipv4(ip, prefix):
+    """
+    Mask a dotted-quad IPv4 address with integer arithmetic, without building an
+    ipaddress network. Returns None when ``ip`` is not an IPv4 address.
+    """
+    try:
+        packed = socket.inet_pton(socket.AF_INET, ip)
+    except (OSError, TypeError):
+        return None
+    network = int.from_bytes(packed, 'big') & _IPV4_NETMASKS[prefix]
+    return f"{socket.inet_ntop(socket.AF_INET, network.to_bytes(4, 'big'))}/{prefix}"
+
 def mask_ip(ip, subnet_mask=24):
+    # Fast path for the common case: IPv4 with a prefix length (IPv6 and netmask
+    # notation go through ipaddress)
+    prefix = str(subnet_mask)
+    if prefix.isascii() and prefix.isdigit() and int(prefix) <= 32:
+        masked = _mask_ipv4(ip, int(prefix))
+        if masked is not None:
+            return masked
     try:
         # Convert the IP address to a network with the given subnet mask
         network = ipaddress.ip_network(f"{ip}/{subnet_mask}", strict=False)
@@ -71,7 +104,13 @@ def process_attributes(attributes):
     """
     Process attributes for anonymization (simplified - no encryption)
     """
+    # Nothing to anonymize: skip the per-attribute work (still return a new list, as
+    # callers extend the result)
+    if not any("action" in attribute for attribute in attributes):
+        return list(attributes)
+
     processed_attributes = []
+    fernet = _FERNET  # resolved once for the whole batch
     
     for attribute in attributes:        
         # Get the action (what to do with this attribute)
@@ -92,7 +131,7 @@ def process_attributes(attributes):
             attribute["type"] = "other"
 
         elif action_type == "encrypt":
-            new_value = encrypt_text(value)
+            new_value = encrypt_text(value, fernet)
             attribute.setdefault("Tag", []).append({"name": f"encrypted-{attribute['category']}-{attribute['type']}"})
             attribute["type"] = "anonymised"
             attribute["category"] = "Other"
@@ -111,17 +150,13 @@ def process_attributes(attributes):
     
     return processed_attributes
 
-def encrypt_text(value):
+def encrypt_text(value, fernet=None):
     "Encrypt text using the cryptography library"
-    if _FERNET is None:
+    fernet = fernet or _FERNET
+    if fernet is None:
         logging.error("Encryption attempted before _FERNET was configured.")
         return value
 
-    token = None
-    try:
-        value = value.encode()
-        token = _FERNET.encrypt(value)
-        to_string = base64.b64encode(token).decode()
-    except TypeError as e:
-        logging.error(e)
-    return to_string
+    # Non-string values (numbers) are encrypted as their text form, as bfv/ckks do
+    token = fernet.encrypt(str(value).encode())
+    return base64.b64encode(token).decode()
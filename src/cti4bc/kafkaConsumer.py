@@ -3,7 +3,7 @@ from threading import Thread, Event
 from kafka import KafkaConsumer, TopicPartition
 
 class KafkaConsumerThread:
-    def __init__(self, topics, kafka_url, kafka_username, kafka_password, handlers):
+    def __init__(self, topics, kafka_url, kafka_username, kafka_password, handlers=None, batch_handlers=None):
         """
         Initialize the KafkaConsumerThread class.
         Args:
@@ -12,12 +12,15 @@ class KafkaConsumerThread:
             kafka_username (str): SASL username.
             kafka_password (str): SASL password.
             handlers (dict): Dictionary mapping topics to handler methods. Handler will be called with message and topic as args.
+            batch_handlers (dict): Dictionary mapping topics to batch handler methods, used instead of `handlers` for
+                their topics. Handler will be called once per polled batch with the list of messages and topic as args.
         """
         self.topics = topics
         self.kafka_url = kafka_url
         self.kafka_username = kafka_username
         self.kafka_password = kafka_password
-        self.handlers = handlers
+        self.handlers = handlers or {}
+        self.batch_handlers = batch_handlers or {}
         self.thread = None
         self.stop_event = Event()
     
@@ -66,26 +69,40 @@ class KafkaConsumerThread:
                         logging.info("Stop event detected, breaking out of consumer loop")
                         break
 
-                    if msg_pack:
-                        logging.info(f"Received {sum(len(msgs) for msgs in msg_pack.values())} messages")
+                    # Per-message logging uses lazy %-formatting: nothing is formatted
+                    # (and the batch size is not summed) unless INFO is enabled
+                    if msg_pack and logging.getLogger().isEnabledFor(logging.INFO):
+                        logging.info("Received %d messages", sum(len(msgs) for msgs in msg_pack.values()))
                         
                     for topic_partition, messages in msg_pack.items():
                         topic = topic_partition.topic
+                        
+                        # Batch handlers get the whole partition batch in one call
+                        batch_handler = self.batch_handlers.get(topic)
+                        if batch_handler:
+                            logging.info("%d messages received from topic %s", len(messages), topic)
+                            try:
+                                batch_handler([message.value for message in messages], topic)
+                                logging.info("Messages processed by batch handler for topic: %s", topic)
+                            except Exception as e:
+                                logging.error("Error in batch handler for topic %s: %s", topic, e)
+                            continue
+                        
+                        # Get the handler for this topic (same for the whole partition batch)
+                        handler = self.handlers.get(topic)
                         for message in messages:
                             value = message.value
-                            logging.info(f"Message received from topic {topic}")
+                            logging.info("Message received from topic %s", topic)
                             
-                            # Get the handler for this topic
-                            handler = self.handlers.get(topic)
                             if handler:
                                 try:
                                     # Process message with handler
                                     handler(value, topic)
-                                    logging.info(f"Message processed by handler for topic: {topic}")
+                                    logging.info("Message processed by handler for topic: %s", topic)
                                 except Exception as e:
-                                    logging.error(f"Error in handler for topic {topic}: {e}")
+                                    logging.error("Error in handler for topic %s: %s", topic, e)
                             else:
-                                logging.warning(f"No handler found for topic: {topic}")
+                                logging.warning("No handler found for topic: %s", topic)
             except Exception as e:
                 logging.error(f"Error in consumer loop: {e}")
         except Exception as e:
@@ -1,12 +1,21 @@
 import aiohttp
 from .. import risk
+import contextlib
+import contextvars
 import json
 import ssl
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
 _URL_ROOT = ''
 _URL = ''
 _HEADERS = {}
 _SSL_CONTEXT = None
+# ClientSession shared by the calls made inside `session()`, if any
+_SESSION = contextvars.ContextVar('misp_event_session', default=None)
 
 
 def _configure(url_root=None, headers=None, ssl_cert_path=None):
@@ -24,13 +33,66 @@ def _configure(url_root=None, headers=None, ssl_cert_path=None):
         _SSL_CONTEXT = False
 
 
+def _dumps(data):
+    '''
+    Compact JSON body for MISP (orjson when installed). MISP does not need indented
+    JSON, which only costs encoding time and bytes on the wire.
+    '''
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:  # e.g. non-str keys or ints beyond 64 bits: stdlib handles them
+            pass
+    return json.dumps(data, separators=(',', ':'))
+
+
+@contextlib.asynccontextmanager
+async def session():
+    '''
+    Share one ClientSession, and its keep-alive connection pool, between all the
+    calls of this module made inside the block (including from tasks it creates):
+
+        async with misp.event.session():
+            await misp.event.add(...)
+            await misp.event.enrich(...)
+
+    Outside such a block every call opens its own session, as before. The shared
+    session is held in a context variable, so concurrent event loops (threads)
+    never see each other's session.
+    '''
+    shared = _SESSION.get()
+    if shared is not None:  # nested block: keep using the outer session
+        yield shared
+        return
+    async with aiohttp.ClientSession(raise_for_status=True) as shared:
+        token = _SESSION.set(shared)
+        try:
+            yield shared
+        finally:
+            _SESSION.reset(token)
+
+
+async def _request(method, url, **kwargs):
+    '''
+    Send a request with the configured headers and TLS settings and return the JSON
+    response, on the shared session when inside `session()`
+    '''
+    shared = _SESSION.get()
+    if shared is not None:
+        # The TLS settings are per request: the shared pool may serve several servers
+        ssl_context = True if _SSL_CONTEXT is None else _SSL_CONTEXT
+        async with shared.request(method, url, headers=_HEADERS, ssl=ssl_context, **kwargs) as res:
+            return await res.json()
+    async with aiohttp.ClientSession(raise_for_status=True, connector=aiohttp.TCPConnector(ssl=_SSL_CONTEXT)) as client:
+        async with client.request(method, url, headers=_HEADERS, **kwargs) as res:
+            return await res.json()
+
+
 async def _get(url):
     '''
     Generic GET for any endpoint
     '''
-    async with aiohttp.ClientSession(raise_for_status=True, connector=aiohttp.TCPConnector(ssl=_SSL_CONTEXT)) as session:
-        async with session.get(url, headers=_HEADERS) as res:
-            return await res.json()
+    return await _request('GET', url)
 
 
 async def _post(url, data=None):
@@ -41,9 +103,7 @@ async def _post(url, data=None):
     403 error: typically token with limited access to that resource, 
                also when payload is ok but value is similar to existing object
     '''
-    async with aiohttp.ClientSession(raise_for_status=True, connector=aiohttp.TCPConnector(ssl=_SSL_CONTEXT)) as session:
-        async with session.post(url, headers=_HEADERS, data=json.dumps(data, indent=4)) as resp:
-            return await resp.json()
+    return await _request('POST', url, data=_dumps(data))
 
 
 async def list():
@@ -50,11 +50,16 @@ def to_misp_attribute(event_id, target_name):
     return attr
 
 
-async def notify_risk(info):
+async def notify_risk(info, session=None):
     '''
     Direct notification to RISK (another option is to populate via Kafka).
     This notification is usually an evidence of disruption in one of the assets.
+    Pass a long-lived `session` (aiohttp.ClientSession) to reuse its connections;
+    otherwise a session is opened for this call only.
     '''
+    if session is not None:
+        async with session.post(f'{_URL}/advanced', headers=_HEADERS, json=info) as resp:
+            return (await resp.json())
     async with aiohttp.ClientSession() as session:
         async with session.post(f'{_URL}/advanced', headers=_HEADERS, json=info) as resp:
             return (await resp.json())
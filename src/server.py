@@ -4,28 +4,130 @@ Simple web server
 Use only when starting CTI as standalone is required.
 Otherwise, keep using this repo as a library.
 '''
+import asyncio
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import sys
+import aiohttp
 from aiohttp import web
 import json
 from cti4bc import risk
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # optional, falls back to the default asyncio loop
+    uvloop = None
+
 PORT = 8001
+# Large MISP events (hundreds of KB to MBs): buffer more of the body per read than the
+# 64 KiB default, and accept bodies above aiohttp's default 1 MiB limit
+READ_BUFSIZE = 4 * 1024 * 1024
+CLIENT_MAX_SIZE = 16 * 1024 * 1024
+# Requests handled at once per process; above this the server answers 503 instead of queueing
+MAX_INFLIGHT = int(os.environ.get('CTI_MAX_INFLIGHT', '256'))
+
+# Request logging goes through a queue: the event loop only enqueues records and a
+# listener thread (started with the app) writes them to stdout
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger('cti4bc.server')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+
+# Parser chosen once at import; both take the raw bytes, so the body is never decoded to str
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_response(obj):
+    if orjson is not None:
+        return web.Response(body=orjson.dumps(obj), content_type='application/json')
+    return web.json_response(obj)
+
+
+# Static response body, encoded once
+_GET_BODY = b'CTI4BC (temporary) standalone server'
 
 
 async def handle_get(request):
-    return web.Response(text='CTI4BC (temporary) standalone server')
+    return web.Response(body=_GET_BODY, content_type='text/plain', charset='utf-8')
 
 
 async def handle_post(request):
-    obj = json.loads(await request.text())
+    body = await request.read()
+    # A body without the "Event" key cannot carry an incident: answer without parsing it
+    if b'"Event"' not in body:
+        return web.Response(status=204)
+    obj = _loads(body)
     if 'Event' in obj:
         event = obj.get('Event')
-        print(f'Sending incident with event id = {event["id"]} to Risk')
-        obj = await risk.notify_risk(event)
-        return web.json_response(obj)
-    return web.Response(text="OK")
+        logger.info('Sending incident with event id = %s to Risk', event['id'])
+        obj = await risk.notify_risk(event, session=request.app['http'])
+        return _json_response(obj)
+    return web.Response(status=204)
+
+
+_inflight = asyncio.Semaphore(MAX_INFLIGHT)
+
 
+@web.middleware
+async def limit_inflight(request, handler):
+    if _inflight.locked():
+        return web.Response(status=503, headers={'Retry-After': '1'})
+    async with _inflight:
+        return await handler(request)
 
-app = web.Application()
+
+async def on_startup(app):
+    app['log_listener'] = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+    app['log_listener'].start()
+    # One client session for all Risk notifications: keep-alive connections are reused
+    app['http'] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=75))
+
+
+async def on_cleanup(app):
+    await app['http'].close()
+    app['log_listener'].stop()
+
+
+app = web.Application(client_max_size=CLIENT_MAX_SIZE, middlewares=[limit_inflight])
+app.on_startup.append(on_startup)
+app.on_cleanup.append(on_cleanup)
 app.router.add_get('/', handle_get)
 app.router.add_post('/', handle_post)
-web.run_app(app, port=PORT)
+
+
+def serve(reuse_port=False):
+    if uvloop is not None:
+        # libuv-based event loop: lower per-request overhead for this I/O-bound server
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    # CTI_NO_ACCESS_LOG turns off the per-request access log line
+    access_log = None if os.environ.get('CTI_NO_ACCESS_LOG') else web.access_logger
+    web.run_app(app, port=PORT, reuse_port=reuse_port, access_log=access_log,
+                handler_args={'read_bufsize': READ_BUFSIZE})
+
+
+def main():
+    # CTI_WORKERS > 1 starts that many processes bound to the same port (SO_REUSEPORT),
+    # so the kernel spreads connections over several cores
+    workers = int(os.environ.get('CTI_WORKERS', '1'))
+    if workers <= 1:
+        serve()
+        return
+    processes = [multiprocessing.Process(target=serve, kwargs={'reuse_port': True}) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
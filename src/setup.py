@@ -9,5 +9,9 @@ setup(
     author_email='contact@montimage.com',
     license='Apache-2.0',
     packages=['cti4bc'],
-    install_requires=['aiohttp', 'pytest']
+    install_requires=['aiohttp'],
+    extras_require={
+        'speedups': ['orjson', "uvloop; sys_platform != 'win32'"],
+        'test': ['pytest'],
+    }
 )